@@ -18,6 +18,7 @@ from PySide6.QtCore import (
     QThreadPool
 )
 from PySide6.QtGui import (
+    QAction,
     QColor,
     QFont,
     QIcon,
@@ -41,9 +42,12 @@ from exploredesktop.modules import (  # isort:skip
 from exploredesktop.modules.app_settings import (  # isort:skip
     ConnectionStatus,
     DataAttributes,
+    DecimationModes,
     EnvVariables,
-    Messages
+    Messages,
+    PlotModes
 )
+from exploredesktop.modules.band_power_module import BandPowerPlot  # isort:skip
 from exploredesktop.modules.bt_module import BTFrameView  # isort:skip
 from exploredesktop.modules.exg_module import ExGPlot  # isort:skip
 from exploredesktop.modules.fft_module import FFTPlot  # isort:skip
@@ -55,6 +59,10 @@ from exploredesktop.modules.menubar_module import MenuBarActions   # isort:skip
 from exploredesktop.modules.mkr_module import MarkerPlot  # isort:skip
 from exploredesktop.modules.orn_module import ORNPlot  # isort:skip
 from exploredesktop.modules.recording_module import RecordFunctions  # isort:skip
+from exploredesktop.modules.render_module import (  # isort:skip
+    RenderScheduler,
+    VisibilityManager
+)
 from exploredesktop.modules.settings_module import SettingsFrameView  # isort:skip
 from exploredesktop.modules.utils import (  # isort:skip
     display_msg,
@@ -144,17 +152,35 @@ class MainWindow(QMainWindow, BaseModel):
         self.exg_plot = ExGPlot(self.ui, self.filters)
         self.exg_plot.setup_ui_connections()
         self.fft_plot = FFTPlot(self.ui)
+        self.band_power_plot = BandPowerPlot(self.ui)
         self.mkr_plot = MarkerPlot(self.ui)
         self.mkr_plot.setup_ui_connections()
 
+        # Single display refresh timer for all the plots
+        self.render_scheduler = RenderScheduler()
+        self.render_scheduler.register(self.exg_plot)
+        self.render_scheduler.register(self.orn_plot)
+        self.render_scheduler.register(self.fft_plot)
+        self.render_scheduler.register(self.band_power_plot)
+        self.render_scheduler.register(self.mkr_plot)
+
+        # Suspend rendering of hidden plots
+        self.visibility = VisibilityManager(self.ui.tabWidget)
+        self.visibility.register(self.exg_plot, self.ui.exg)
+        self.visibility.register(self.orn_plot, self.ui.orn)
+        self.visibility.register(self.fft_plot, self.ui.fft)
+        self.visibility.register(self.band_power_plot, self.ui.fft)
+
         self.ui.tabWidget.currentChanged.connect(self.plot_tab_changed)
+        self.ui.stackedWidget.currentChanged.connect(self.update_plot_visibility)
+        self.update_plot_visibility()
 
         # RECORDING
         self.recording = RecordFunctions(self.ui)
         self.recording.setup_ui_connections()
 
         # INTEGRATION PAGE
-        self.integration_frame = IntegrationFrameView(self.ui)
+        self.integration_frame = IntegrationFrameView(self.ui, self.band_power_plot.model)
         self.integration_frame.setup_ui_connections()
 
         # signal connections
@@ -169,10 +195,13 @@ class MainWindow(QMainWindow, BaseModel):
     def reset_vars(self) -> None:
         """Reset all variables"""
         self.is_streaming = False
+        self.render_scheduler.stop()
+        self.action_review.setChecked(False)
         self.exg_plot.reset_vars()
         self.orn_plot.reset_vars()
         # self.orn_plot.get_model().reset_vars()
         self.fft_plot.reset_vars()
+        self.band_power_plot.reset_vars()
         self.footer_frame.get_model().reset_vars()
         self.imp_frame.get_model().reset_vars()
         self.filters.reset_vars()
@@ -286,6 +315,7 @@ class MainWindow(QMainWindow, BaseModel):
         self.ui.actionMetadata_import.setEnabled(enable)
         self.ui.actionMetadata_export.setEnabled(enable)
         self.ui.actionLast_Session_Settings.setEnabled(enable)
+        self.ui.menuVisualization.menuAction().setVisible(enable)
 
     def _setup_menubar(self) -> None:
         """Setup menubar actions
@@ -346,6 +376,52 @@ class MainWindow(QMainWindow, BaseModel):
         # actionScrollView.triggered.connect(lambda: self.exg_plot.model.change_vis_mode(VisModes.SCROLL))
         # actionScrollView.triggered.connect(self._init_plots)
 
+        # Envelope view: keep min/max of each downsampling bucket so that spikes are not hidden
+        self.action_envelope_view = QAction("Envelope View", self)
+        self.action_envelope_view.setCheckable(True)
+        self.action_envelope_view.toggled.connect(
+            lambda checked: self.exg_plot.model.set_decimation_mode(
+                DecimationModes.ENVELOPE if checked else DecimationModes.FILTER))
+        self.ui.menuVisualization.addAction(self.action_envelope_view)
+
+        # Batched rendering: draw all ExG channels with a single item
+        self.action_batched_rendering = QAction("Batched Rendering", self)
+        self.action_batched_rendering.setCheckable(True)
+        self.action_batched_rendering.setChecked(self.exg_plot.sweep.batched)
+        self.action_batched_rendering.toggled.connect(self.exg_plot.sweep.set_batched)
+        self.ui.menuVisualization.addAction(self.action_batched_rendering)
+
+        # Pause and review: stop the ExG sweep and scroll back through the history
+        self.action_review = QAction("Pause and Review", self)
+        self.action_review.setCheckable(True)
+        self.action_review.toggled.connect(self.exg_plot.set_paused)
+        self.ui.menuVisualization.addAction(self.action_review)
+
+        # Moving window: newest data at the right edge instead of sweeping, selectable for each plot
+        self.action_moving_exg = QAction("Moving Window ExG", self)
+        self.action_moving_exg.setCheckable(True)
+        self.action_moving_exg.toggled.connect(
+            lambda checked: self.exg_plot.set_plot_mode(PlotModes.MOVING if checked else PlotModes.SWEEP))
+        self.ui.menuVisualization.addAction(self.action_moving_exg)
+
+        self.action_moving_orn = QAction("Moving Window ORN", self)
+        self.action_moving_orn.setCheckable(True)
+        self.action_moving_orn.toggled.connect(
+            lambda checked: self.orn_plot.set_plot_mode(PlotModes.MOVING if checked else PlotModes.SWEEP))
+        self.ui.menuVisualization.addAction(self.action_moving_orn)
+
+        # Spectrogram of one channel in the FFT tab
+        self.action_spectrogram = QAction("Spectrogram", self)
+        self.action_spectrogram.setCheckable(True)
+        self.action_spectrogram.toggled.connect(self.fft_plot.set_spectrogram_visible)
+        self.ui.menuVisualization.addAction(self.action_spectrogram)
+
+        # Band power bars in the FFT tab
+        self.action_band_power = QAction("Band Power", self)
+        self.action_band_power.setCheckable(True)
+        self.action_band_power.toggled.connect(self.band_power_plot.set_band_power_visible)
+        self.ui.menuVisualization.addAction(self.action_band_power)
+
         self.ui.actionReceive_LSL_Markers.triggered.connect(self.mkr_plot.model.enable_external_markers)
         # self.ui.actionReceive_LSL_Markers.setVisible(True)
         # self.ui.actionReceive_LSL_Markers.setChecked(False)
@@ -355,6 +431,7 @@ class MainWindow(QMainWindow, BaseModel):
         self.orn_plot.init_plot()
         self.exg_plot.init_plot()
         self.fft_plot.init_plot()
+        self.band_power_plot.init_plot()
 
     def setup_signal_connections(self):
         """Connect custom signals to corresponding slots
@@ -373,9 +450,6 @@ class MainWindow(QMainWindow, BaseModel):
 
         self.signals.pageChange.connect(self.handle_page_navigation)
 
-        self.signals.ornChanged.connect(self.orn_plot.swipe_plot)
-        self.signals.exgChanged.connect(self.exg_plot.swipe_plot)
-
         self.signals.tRangeORNChanged.connect(self.orn_plot.set_t_range)
         self.signals.tAxisORNChanged.connect(self.orn_plot.set_t_axis)
 
@@ -383,15 +457,17 @@ class MainWindow(QMainWindow, BaseModel):
         self.signals.tAxisEXGChanged.connect(self.exg_plot.set_t_axis)
 
         self.signals.updateYAxis.connect(self.exg_plot.add_left_axis_ticks)
+        self.signals.updateYAxis.connect(self.exg_plot.update_scale)
 
         self.signals.restartPlot.connect(self.exg_plot.init_plot)
         self.signals.restartPlot.connect(self.fft_plot.init_plot)
+        self.signals.restartPlot.connect(self.band_power_plot.init_plot)
 
         self.signals.mkrPlot.connect(self.mkr_plot.plot_marker)
-        self.signals.mkrAdd.connect(self.mkr_plot.model.add_mkr)
         # self.signals.mkrReplot.connect(lambda data: self.mkr_plot.plot_marker(data, replot=True))
         self.signals.replotMkrAdd.connect(self.mkr_plot.model.add_mkr_replot)
         self.signals.mkrRemove.connect(self.mkr_plot.remove_old_item)
+        self.signals.mkrClear.connect(self.mkr_plot.clear_markers)
 
         self.signals.updateDataAttributes.connect(self.exg_plot.model.update_attributes)
 
@@ -550,6 +626,7 @@ class MainWindow(QMainWindow, BaseModel):
 
             if not self.is_streaming and filt:
                 self._subscribe_callbacks()
+                self.render_scheduler.start()
                 self.is_streaming = True
                 self.mkr_plot.model.start_lsl_marker_thread()
 
@@ -558,22 +635,25 @@ class MainWindow(QMainWindow, BaseModel):
         return True
 
     def plot_tab_changed(self, idx: int) -> None:
-        """Activate/deactivate fft measurment when plot tab changes
+        """Suspend rendering of the plots in the hidden tabs when plot tab changes
 
         Args:
             idx (int): index of the active tab
         """
-        if idx == 2:  # FFT tab active
-            self.fft_plot.start_timer()
-        else:
-            self.fft_plot.stop_timer()
+        self.visibility.update()
+
+    def update_plot_visibility(self) -> None:
+        """Suspend rendering of all plots if the plots page is not displayed or the window is minimized"""
+        plots_displayed = self.ui.stackedWidget.currentWidget() == self.ui.page_plotsNoWidget
+        self.visibility.set_window_visible(plots_displayed and not self.isMinimized())
 
     def _subscribe_callbacks(self) -> None:
         """Subscribe signal callbacks
         """
         self.explorer.subscribe(callback=self.orn_plot.model.callback, topic=TOPICS.raw_orn)
-        self.explorer.subscribe(callback=self.exg_plot.model.callback, topic=TOPICS.filtered_ExG)
-        self.explorer.subscribe(callback=self.fft_plot.model.callback, topic=TOPICS.filtered_ExG)
+        self.explorer.add_exg_consumer(self.exg_plot.model.callback)
+        self.explorer.add_exg_consumer(self.fft_plot.model.callback)
+        self.explorer.add_exg_consumer(self.band_power_plot.model.callback)
         self.explorer.subscribe(callback=self.mkr_plot.model.callback, topic=TOPICS.marker)
 
     def _move_to_settings(self) -> None:
@@ -707,9 +787,11 @@ class MainWindow(QMainWindow, BaseModel):
         """Override close event with  actions to perform on close
         """
         QThreadPool().globalInstance().waitForDone()
+        self.render_scheduler.stop()
         self.stop_processes()
         if self.explorer.device_name is not None:
             self.explorer.disconnect()
+        self.exg_plot.model.close_history()
         return super().closeEvent(event)
 
     def set_permissions(self) -> None:
@@ -736,6 +818,7 @@ class MainWindow(QMainWindow, BaseModel):
     def changeEvent(self, event: PySide6.QtCore.QEvent) -> None:
         if event.type() == QEvent.WindowStateChange:
             self.resize_settings_table()
+            self.update_plot_visibility()
         return super().changeEvent(event)
 
     def resize_settings_table(self):
@@ -66,11 +66,35 @@ class DataAttributes(BaseEnum):
     ORNPOINTER = auto()
 
 
+class QueuePolicy(BaseEnum):
+    """Enum for packet queue overflow policies"""
+    DROP_OLDEST = "drop_oldest"
+    BLOCK = "block"
+
+
 class VisModes(BaseEnum):
     FULL = "full"
     SCROLL = "scroll"
 
 
+class PlotModes(BaseEnum):
+    """Enum for time axis modes of the plots"""
+    SWEEP = "sweep"
+    MOVING = "moving"
+
+
+class DecimationModes(BaseEnum):
+    """Enum for ExG visualization downsampling modes"""
+    FILTER = "filter"
+    ENVELOPE = "envelope"
+
+
+class PSDAveraging(BaseEnum):
+    """Enum for averaging modes of the streaming power spectral density"""
+    EXPONENTIAL = "exponential"
+    FIXED = "fixed"
+
+
 class ExGModes(BaseEnum):
     """Enum for supported ExG modes"""
     EEG = "EEG"
@@ -239,7 +263,38 @@ class Settings():
 
     ORN_SRATE = 20  # Hz
     EXG_VIS_SRATE = 125
+    DECIMATION_TAPS_PER_FACTOR = 10  # FIR taps per unit of decimation factor
+    DECIMATION_CUTOFF = 0.8  # low-pass cutoff relative to the output Nyquist frequency
+    REFRESH_RATES = [30, 60]  # Hz
+    DISPLAY_REFRESH_RATE = 30  # Hz
+    SWEEP_SEGMENT_SIZE = 250  # samples per cached curve segment
+    BATCHED_RENDERING = False  # draw all ExG channels with a single item
+    VIEWPORT_MARGIN = 1  # channels rendered above and below the visible ExG channels
+    PACKET_QUEUE_SIZE = 1024  # packets
+    QUEUE_BLOCK_TIMEOUT = 1  # Seconds
+    GAP_TOLERANCE = 1  # samples of timestamp jitter before a packet is considered late or a gap is inserted
+    MAX_PACKET_DELAY = 1  # Seconds. Timestamps going further back are considered a clock reset
+    HISTORY_LENGTH = 30 * 60  # Seconds of ExG data kept for review
+    HISTORY_CHUNK_SIZE = 1250  # samples per history chunk
+    HISTORY_RAM_CHUNKS = 6  # most recent history chunks kept in RAM, older ones are written to a temporary file
     WIN_LENGTH = 10  # Seconds
+    PSD_SEGMENT_LENGTH = 2  # Seconds of data in each Welch segment
+    PSD_OVERLAP = 0.5  # overlap between consecutive Welch segments
+    PSD_AVERAGING = PSDAveraging.EXPONENTIAL
+    PSD_N_AVERAGE = 8  # segments averaged (fixed) or time constant in segments (exponential)
+    PSD_MAX_PENDING = 30  # Seconds of data kept for the spectrum while it is not updated
+    SPECTROGRAM_SEGMENT_LENGTH = 1  # Seconds of data in each spectrogram column
+    SPECTROGRAM_HOP = 0.25  # Seconds between spectrogram columns
+    SPECTROGRAM_DURATION = 120  # Seconds displayed in the spectrogram
+    SPECTROGRAM_MAX_FREQ = 70  # Hz
+    SPECTROGRAM_LEVELS = [5, 99.5]  # percentiles of the spectrogram mapped to the ends of the color map
+    BAND_POWER_BANDS = {  # Hz, from the lower edge (included) to the upper edge (excluded)
+        "delta": (1, 4), "theta": (4, 8), "alpha": (8, 13), "beta": (13, 30), "gamma": (30, 45)
+    }
+    BAND_POWER_SEGMENT_LENGTH = 1  # Seconds of data in each band power estimate
+    BAND_POWER_HOP = 0.1  # Seconds between band power samples
+    BAND_POWER_TIME_CONSTANT = 1  # Seconds, exponential smoothing of the band powers
+    BAND_POWER_LSL_SUFFIX = "_BandPower"  # appended to the device name to get the LSL stream name
     # MODE_LIST = ['EEG', 'ECG']
     MAX_CHANNELS = 32
     CHAN_LIST = [f'ch{i}' for i in range(1, MAX_CHANNELS + 1)]
@@ -252,6 +307,12 @@ class Settings():
         "1 uV": 0, "5 uV": -0.66667, "10 uV": -1, "50 uV": -1.66667, "100 uV": -2,
         "200 uV": -2.33333, "500 uV": -2.66667, "1 mV": -3,
         "5 mV": -3.66667, "10 mV": -4, "100 mV": -5}
+    AUTO_SCALE = "Auto"  # scale menu entry fitting each channel to its own amplitude
+    AUTO_SCALE_N_STD = 3  # amplitude of a channel in standard deviations of the signal
+    AUTO_SCALE_FILL = 0.4  # fraction of the channel spacing covered by the amplitude of the channel
+    AUTO_SCALE_MIN_AMPLITUDE = 1  # uV. Flat channels are not magnified any further
+    AUTO_SCALE_TIME_CONSTANT = 1  # s. Time constant of the average of the gain of each channel
+    AUTO_SCALE_TOLERANCE = 0.01  # relative change of the averaged gain before the channel is rescaled
 
     TIME_RANGE_MENU = {"10 s": 10., "5 s": 5., "20 s": 20.}
     SAMPLING_RATES = [250, 500, 1000]
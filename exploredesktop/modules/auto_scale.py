@@ -0,0 +1,80 @@
+"""Streaming amplitude estimation used to scale each ExG channel automatically"""
+import logging
+
+import numpy as np
+
+
+from exploredesktop.modules.app_settings import Settings  # isort:skip
+
+
+logger = logging.getLogger("explorepy." + __name__)
+
+# ratio between the standard deviation and the median absolute deviation of a gaussian signal
+MAD_TO_STD = 1.4826
+
+
+class AmplitudeEstimator:
+    """Streaming robust amplitude estimate for channels x samples blocks
+
+    The median absolute deviation (MAD) of each block from the running center of the channel is averaged with an
+    exponential moving average. Its time constant is the plot window, so the estimate follows the visible data
+    without keeping it. Spikes and short artifacts barely move the median, so they don't shrink the other samples.
+    All the channels are processed at once. Channels without an estimate yet (e.g. the first blocks were missing
+    data) are seeded with the first block containing data.
+
+    Args:
+        s_rate (float): sampling rate of the data
+        n_chan (int): number of channels
+        window (float): time constant of the average in seconds
+    """
+
+    def __init__(self, s_rate: float, n_chan: int, window: float) -> None:
+        self.s_rate = s_rate
+        self.n_chan = n_chan
+        self.window = window
+
+        self.center = None
+        self.mad = None
+
+    def accepts(self, s_rate: float, n_chan: int) -> bool:
+        """Whether the estimator can process data with the given sampling rate and number of channels
+
+        Args:
+            s_rate (float): sampling rate
+            n_chan (int): number of channels
+        """
+        return s_rate == self.s_rate and n_chan == self.n_chan
+
+    def update(self, block: np.ndarray) -> None:
+        """Update the estimate with a new block of samples
+
+        Args:
+            block (np.ndarray): channels x samples block
+        """
+        if block.shape[1] == 0:
+            return
+        if self.center is None:
+            self.center = np.full(self.n_chan, np.nan)
+            self.mad = np.full(self.n_chan, np.nan)
+
+        center = np.median(block, axis=1)
+        seed = ~(np.isfinite(self.center) & np.isfinite(self.mad))
+        # deviation from the running center, or from the block center for the channels being seeded
+        reference = np.where(seed, center, self.center)
+        mad = np.median(np.abs(block - reference[:, np.newaxis]), axis=1)
+        # channels with missing data keep their estimate
+        finite = np.isfinite(center) & np.isfinite(mad)
+        self.center[finite & seed] = center[finite & seed]
+        self.mad[finite & seed] = mad[finite & seed]
+
+        update = finite & ~seed
+        alpha = min(block.shape[1] / (self.s_rate * self.window), 1.)
+        self.center[update] += alpha * (center[update] - self.center[update])
+        self.mad[update] += alpha * (mad[update] - self.mad[update])
+
+    @property
+    def amplitude(self) -> np.ndarray:
+        """Returns amplitude of each channel (half range containing most of the samples), NaN if there is no data"""
+        if self.mad is None:
+            return np.full(self.n_chan, np.nan)
+        return Settings.AUTO_SCALE_N_STD * MAD_TO_STD * self.mad
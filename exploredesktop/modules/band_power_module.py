@@ -0,0 +1,309 @@
+"""Band power module: power of each ExG channel in frequency bands, plotted and streamed to LSL"""
+import logging
+from typing import (
+    List,
+    Optional,
+    Tuple
+)
+
+import numpy as np
+import pyqtgraph as pg
+from pylsl import (
+    StreamInfo,
+    StreamOutlet,
+    local_clock
+)
+from PySide6.QtCore import Slot
+
+
+from exploredesktop.modules.app_settings import (  # isort:skip
+    DataAttributes,
+    Settings,
+    Stylesheets
+)
+from exploredesktop.modules.base_data_module import (  # isort:skip
+    BasePlots,
+    DataContainer
+)
+from exploredesktop.modules.explore_interface import ExGBlock  # isort:skip
+from exploredesktop.modules.spectral import BandPowerEstimator  # isort:skip
+
+
+logger = logging.getLogger("explorepy." + __name__)
+
+
+class BandPowerOutlet:
+    """LSL outlet streaming the band powers of all the channels
+
+    Each sample has one value per channel and band, grouped by channel: ch1_delta, ch1_theta, ..., ch2_delta, ...
+
+    Args:
+        name (str): stream name and source id
+        channels (list): channel names
+        bands (list): band names
+        rate (float): samples per second
+    """
+
+    def __init__(self, name: str, channels: List[str], bands: List[str], rate: float) -> None:
+        self.channels = list(channels)
+        self.bands = list(bands)
+
+        info = StreamInfo(
+            name=name, type="BandPower", channel_count=len(self.channels) * len(self.bands), nominal_srate=rate,
+            channel_format="float32", source_id=name
+        )
+        info.desc().append_child_value("manufacturer", "Mentalab")
+        desc = info.desc().append_child("channels")
+        for chan in self.channels:
+            for band in self.bands:
+                desc.append_child("channel") \
+                    .append_child_value("name", f"{chan}_{band}") \
+                    .append_child_value("unit", "uV^2") \
+                    .append_child_value("type", "BandPower")
+        self.outlet = StreamOutlet(info)
+        logger.info("LSL band power stream has been created with name/source ID %s", name)
+
+    def accepts(self, channels: List[str], bands: List[str]) -> bool:
+        """Whether the outlet can stream the given channels and bands
+
+        Args:
+            channels (list): channel names
+            bands (list): band names
+        """
+        return list(channels) == self.channels and list(bands) == self.bands
+
+    def push(self, band_power: np.ndarray, lsl_time: np.ndarray) -> None:
+        """Push band powers
+
+        Args:
+            band_power (np.ndarray): samples x channels x bands array
+            lsl_time (np.ndarray): LSL timestamp of each sample
+        """
+        self.outlet.push_chunk(
+            np.ascontiguousarray(band_power.reshape(len(band_power), -1), dtype=np.float32), timestamp=list(lsl_time))
+
+
+class BandPowerData(DataContainer):
+    """Band power model
+
+    Band powers are estimated in the Qt thread as the data is ingested, while they are plotted or streamed to LSL,
+    so the LSL stream doesn't depend on the plot. Each estimate only costs one FFT of each channel.
+
+    Estimates are timestamped with the time of the last sample of their segment in the LSL clock. The offset to the
+    LSL clock is taken when the packet is received in the explorepy thread, as the device ExG stream does, so both
+    streams are aligned whatever the delay of the Qt thread. The estimate restarts after gaps and late packets, so
+    segments never join non-contiguous data.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.estimator = None
+        # LSL outlet, created with the first estimate while streaming
+        self.outlet = None
+        self.streaming = False
+        # whether the band power plot is shown
+        self.plotted = False
+
+        self.signals.updateDataAttributes.connect(self.update_attributes)
+
+    @Slot(list)
+    def update_attributes(self, attributes: list) -> None:
+        """Update class attributes
+
+        Args:
+            attributes (list): list of attributes to update
+        """
+        if DataAttributes.DATA in attributes:
+            # band powers of the previous channels are not kept
+            self.estimator = None
+
+    def callback(self, block: ExGBlock) -> None:
+        """Callback to obtain filtered ExG data. Runs in the explorepy thread, data is only queued
+
+        Args:
+            block (ExGBlock): decoded EEG packet with active channels only
+        """
+        # offset from the device clock to the LSL clock on reception
+        self.queue.put((block, local_clock() - block.timestamp[-1]))
+
+    def ingest(self, item: Tuple[ExGBlock, float]) -> None:
+        """Add ExG data to the band power estimate and stream the new estimates
+
+        Args:
+            item (Tuple[ExGBlock, float]): decoded EEG packet with active channels only and offset to the LSL clock
+        """
+        (timestamp, exg), lsl_offset = item
+        s_rate = self.explorer.sampling_rate
+        n_chan = len(self.explorer.chan_layout.names)
+        # channels might be out of sync while the channel mask is being changed
+        if s_rate is None or exg.shape[0] != n_chan:
+            return
+        if not self.streaming and not self.plotted:
+            # nothing uses the estimates, they start again from the data received once they are needed
+            self.estimator = None
+            self.check_timestamps(timestamp, s_rate)
+            return
+        if self.estimator is None or not self.estimator.accepts(s_rate, n_chan):
+            self.estimator = BandPowerEstimator(s_rate, n_chan)
+        if not self.check_timestamps(timestamp, s_rate):
+            # segments are restarted from the next packet
+            self.estimator.reset()
+            return
+
+        band_power, seg_end = self.estimator.update(exg)
+        if len(band_power) == 0:
+            return
+        self.dirty = True
+        if self.streaming:
+            self.push_lsl(band_power, timestamp[seg_end] + lsl_offset)
+
+    def insert_gap(self, t_start: float, t_end: float) -> None:
+        """Restart the estimate after missing data. Segments must not join the data around the gap
+
+        Args:
+            t_start (float): timestamp of the first missing sample
+            t_end (float): timestamp of the first sample after the gap
+        """
+        if self.estimator is not None:
+            self.estimator.reset()
+
+    def restart_clock(self, timestamp: float) -> None:
+        """Restart the estimate after a reset of the device clock
+
+        Args:
+            timestamp (float): first timestamp of the new clock
+        """
+        super().restart_clock(timestamp)
+        if self.estimator is not None:
+            self.estimator.reset()
+
+    def push_lsl(self, band_power: np.ndarray, lsl_time: np.ndarray) -> None:
+        """Push band powers to the LSL outlet
+
+        Args:
+            band_power (np.ndarray): samples x channels x bands array
+            lsl_time (np.ndarray): LSL timestamp of each sample
+        """
+        channels = self.explorer.active_chan_list(custom_name=True)
+        if self.outlet is None or not self.outlet.accepts(channels, self.estimator.bands):
+            self.outlet = BandPowerOutlet(
+                self.explorer.device_name + Settings.BAND_POWER_LSL_SUFFIX, channels, self.estimator.bands,
+                self.estimator.rate
+            )
+        self.outlet.push(band_power, lsl_time)
+
+    def start_lsl(self) -> None:
+        """Start streaming the band powers to LSL"""
+        self.streaming = True
+
+    def stop_lsl(self) -> None:
+        """Stop streaming the band powers to LSL and close the outlet"""
+        self.streaming = False
+        self.outlet = None
+
+    def band_power_plot_data(self) -> Optional[np.ndarray]:
+        """Returns channels x bands relative band power (percentage of the power in all the bands) to plot"""
+        if self.estimator is None:
+            return None
+        power = self.estimator.power
+        if power is None:
+            return None
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return 100 * power / power.sum(axis=1, keepdims=True)
+
+
+class BandPowerPlot(BasePlots):
+    """Band power plotting class. Bars of all the channels are grouped by band"""
+    def __init__(self, ui) -> None:
+        super().__init__(ui)
+        self.model = BandPowerData()
+
+        # bar plot next to the spectrum. Hidden until it is enabled
+        self.plot_band_power = pg.PlotWidget(self.ui.fft)
+        self.bars = pg.BarGraphItem(x=[], height=[], width=1)
+        self._setup_band_power()
+
+    def _setup_band_power(self) -> None:
+        """Add the band power plot to the FFT tab"""
+        self.ui.horizontalLayout_23.addWidget(self.plot_band_power)
+        self.plot_band_power.setHidden(True)
+        self._update_plotted()
+
+        plot_wdgt = self.plot_band_power
+        plot_wdgt.setBackground(Stylesheets.PLOT_BACKGROUND)
+        plot_wdgt.setLabel('left', 'Relative power (%)')
+        plot_wdgt.showGrid(y=True, alpha=0.5)
+        plot_wdgt.setMouseEnabled(x=False, y=False)
+        plot_wdgt.setYRange(0, 100, padding=0)
+        bands = list(Settings.BAND_POWER_BANDS)
+        plot_wdgt.getAxis('bottom').setTicks([list(enumerate(bands))])
+        plot_wdgt.setXRange(-0.5, len(bands) - 0.5, padding=0)
+        plot_wdgt.addItem(self.bars)
+
+    def init_plot(self) -> None:
+        """Initialize bars of the active channels. Colors are the ones of the spectrum"""
+        chan_dict = self.model.explorer.get_chan_dict_list()
+        colors = [
+            Stylesheets.FFT_LINE_COLORS[idx] for idx, one_chan_dict in enumerate(chan_dict) if one_chan_dict['enable']]
+        n_chan = len(colors)
+        n_bands = len(Settings.BAND_POWER_BANDS)
+        if n_chan == 0:
+            self.bars.setOpts(x=[], height=[])
+            return
+
+        # channels side by side around each band
+        width = 0.8 / n_chan
+        offsets = (np.arange(n_chan) - (n_chan - 1) / 2) * width
+        x_vector = (np.arange(n_bands)[np.newaxis, :] + offsets[:, np.newaxis]).ravel()
+        colors = [color for color in colors for _ in range(n_bands)]
+        self.bars.setOpts(
+            x=x_vector, height=np.zeros(len(x_vector)), width=width, brushes=[pg.mkBrush(color) for color in colors],
+            pens=[pg.mkPen(color) for color in colors]
+        )
+        self.model.dirty = True
+
+    def refresh(self) -> None:
+        """Ingest queued data and plot the latest band powers"""
+        self.model.process_queue()
+        # data stays dirty while the plot is hidden and is plotted when it becomes visible
+        if not self.model.plotted or not self.model.dirty:
+            return
+        self.model.dirty = False
+        data = self.model.band_power_plot_data()
+        if data is None or data.size != len(self.bars.opts['x']):
+            return
+        self.bars.setOpts(height=np.nan_to_num(data).ravel())
+
+    def _update_plotted(self) -> None:
+        """Tell the model whether the band powers are plotted"""
+        self.model.plotted = self.visible and self.plot_band_power.isVisibleTo(self.ui.fft)
+
+    def set_visible(self, visible: bool) -> None:
+        """Set whether the FFT tab is visible. Band powers are only computed for the LSL stream while it is hidden
+
+        Args:
+            visible (bool): whether the plot is visible
+        """
+        super().set_visible(visible)
+        self._update_plotted()
+
+    @Slot(bool)
+    def set_band_power_visible(self, visible: bool) -> None:
+        """Show or hide the band power plot. Band powers are only computed for the LSL stream while it is hidden
+
+        Args:
+            visible (bool): whether the plot is visible
+        """
+        self.plot_band_power.setVisible(visible)
+        self.model.dirty = True
+        self._update_plotted()
+
+    def reset_vars(self) -> None:
+        """Reset estimate"""
+        self.model.queue.clear()
+        self.model.estimator = None
+        self.model.dirty = False
+        self.model.next_timestamp = None
+
+    def swipe_plot(self, data):
+        raise NotImplementedError
@@ -4,6 +4,8 @@ import math
 from abc import abstractmethod
 from enum import Enum
 from typing import (
+    List,
+    Optional,
     Tuple,
     Union
 )
@@ -14,10 +16,13 @@ from PySide6.QtCore import Slot
 
 
 from exploredesktop.modules.app_settings import (  # isort: skip
+    PlotModes,
     Settings,
     Stylesheets
 )
 from exploredesktop.modules.base_model import BaseModel  # isort: skip
+from exploredesktop.modules.packet_queue import PacketQueue  # isort: skip
+from exploredesktop.modules.ring_buffer import RingBuffer  # isort: skip
 
 logger = logging.getLogger("explorepy." + __name__)
 
@@ -27,33 +32,83 @@ class DataContainer(BaseModel):
     """
     vis_time_offset = None
     last_t = 0
+    # samples disconnected at each side of the position line
+    connection_gap = 0
 
     def __init__(self) -> None:
         super().__init__()
-        self.plot_data = {}
-        self.t_plot_data = np.array([])
+        self.buffer = RingBuffer(gap=self.connection_gap)
+        # samples per second in the buffer, used to keep the data when it is resized
+        self._buffer_rate = None
+        # packets handed off from the explorepy thread, ingested in the Qt thread
+        self.queue = PacketQueue()
+        # whether there is new data that has not been plotted yet
+        self.dirty = False
 
-        self.pointer = 0
+        # timestamp gap detection
+        self.next_timestamp = None
+        self.lost_samples = 0
+        self.late_packets = 0
+
+        # time axis ticks are only updated when this key changes
+        self._ticks_key = None
+
+        # sweep: new data overwrites the old one from left to right. moving: the newest data is at the right edge
+        self.plot_mode = PlotModes.SWEEP
 
         self.timescale = 10
 
     def reset_vars(self) -> None:
         """Reset class and instance variables values"""
-        self.plot_data = {}
-        self.t_plot_data = np.array([])
+        self.buffer = RingBuffer(gap=self.connection_gap)
+        self._buffer_rate = None
+        self.queue.clear()
+        self.dirty = False
 
-        self.pointer = 0
+        self.next_timestamp = None
+        self.lost_samples = 0
+        self.late_packets = 0
+        self._ticks_key = None
 
         self.vis_time_offset = None
 
         self.timescale = 10
         self.last_t = 0
 
+    @property
+    def plot_data(self) -> dict:
+        """Returns dictionary with a view of the buffer for each channel"""
+        return self.buffer.views
+
+    @property
+    def t_plot_data(self) -> np.ndarray:
+        """Returns time vector of the buffer"""
+        return self.buffer.t
+
+    @property
+    def pointer(self) -> int:
+        """Returns position of the buffer write head"""
+        return self.buffer.head
+
+    @pointer.setter
+    def pointer(self, value: int) -> None:
+        self.buffer.seek(value)
+
     @abstractmethod
     def callback(self, packet):
         """callback"""
         raise NotImplementedError
 
+    @abstractmethod
+    def ingest(self, item):
+        """Process data queued by the callback"""
+        raise NotImplementedError
+
+    def process_queue(self) -> None:
+        """Ingest all the packets queued since the last call. Must be called from the Qt thread"""
+        for item in self.queue.get_all():
+            self.ingest(item)
+
     @abstractmethod
     def update_attributes(self, attributes: list) -> None:
         """update class attributes"""
@@ -86,6 +141,55 @@ class DataContainer(BaseModel):
 
         return item_dict, to_remove
 
+    def resize_buffer(self, channels: List[str], n_samples: int) -> None:
+        """Resize the buffer keeping the most recent samples
+
+        Time scale and active channel changes re-window the samples already in the buffer instead of discarding
+        them, so the plot is not blanked. Data is only discarded if the number of samples per second changes
+        (e.g. new decimation mode).
+
+        Args:
+            channels (list): channel names
+            n_samples (int): number of samples per channel
+        """
+        old_rate = self._buffer_rate
+        rate = n_samples / self.timescale
+        self._buffer_rate = rate
+        if len(self.buffer) == 0 or n_samples == 0 or old_rate is None or not np.isclose(rate, old_rate):
+            self.buffer.resize(channels, n_samples)
+            return
+
+        # samples written before the last wrap were shifted one (old) time scale ahead in sweep mode, see on_wrap
+        t_shift = len(self.buffer) / old_rate if self.plot_mode == PlotModes.SWEEP else 0.
+        n_kept = self.buffer.rewindow(channels, n_samples, t_shift=t_shift)
+        logger.debug("Buffer resized to %i samples, %i samples kept", n_samples, n_kept)
+        self.dirty = True
+
+    def window_start(self, default: Optional[float] = None) -> float:
+        """Returns time at the left edge of the plot window
+
+        Args:
+            default (float, optional): value returned if the window is empty. Defaults to None (last time received).
+        """
+        if len(self.buffer) and np.isfinite(self.t_plot_data[0]):
+            return float(self.t_plot_data[0])
+        return DataContainer.last_t if default is None else default
+
+    def set_plot_mode(self, mode: PlotModes) -> None:
+        """Set whether the plot sweeps or moves with the newest sample
+
+        Args:
+            mode (PlotModes): new plot mode
+        """
+        if mode == self.plot_mode:
+            return
+        logger.debug("Plot mode has been changed to %s", mode.value)
+        self.plot_mode = mode
+        # samples written before the last wrap are only shifted one time scale ahead in sweep mode, see on_wrap
+        self.t_plot_data[self.pointer:] += self.timescale if mode == PlotModes.SWEEP else -self.timescale
+        self.reset_ticks()
+        self.dirty = True
+
     def change_timescale(self) -> None:
         """Write in log file time scale change
         """
@@ -119,115 +223,98 @@ class DataContainer(BaseModel):
 
         return int(points)
 
-    @staticmethod
-    def get_n_new_points(data: dict) -> int:
-        """Get number of new points in vector
+    def insert_new_data(self, block: np.ndarray, t: Optional[np.ndarray] = None) -> None:
+        """Insert new data into the ring buffer at the current pointer position
 
         Args:
-            data (dict): dictionary with new points
+            block (np.ndarray): channels x samples array with the new data, rows ordered as the buffer channels
+            t (np.ndarray, optional): time vector of the new data. Defaults to None (e.g. FFT data).
+        """
+        self.buffer.write(block, t)
+
+    def check_timestamps(self, timestamp: np.ndarray, s_rate: float) -> bool:
+        """Compare the timestamps of a packet with the expected sample period
+
+        Missing samples (e.g. bluetooth drops) are replaced by NaNs in the buffer so they are displayed as a gap.
+        Late and out-of-order packets are discarded. If timestamps go back more than Settings.MAX_PACKET_DELAY
+        seconds, the clock is considered reset: the plot restarts from the packet, see restart_clock.
+
+        Args:
+            timestamp (np.ndarray): timestamps of the packet
+            s_rate (float): sampling rate of the packet
 
         Returns:
-            int: number of points
+            bool: whether the packet has to be added to the buffer
         """
-        # IndexError might happen on disconnect, when some signals are terminated before others
-        n_new_points = len(data[list(data.keys())[0]])
-        return n_new_points
+        period = 1 / s_rate
+        if self.next_timestamp is not None:
+            delta = (timestamp[0] - self.next_timestamp) / period
+            if delta < -Settings.GAP_TOLERANCE:
+                if -delta * period <= Settings.MAX_PACKET_DELAY:
+                    self.late_packets += 1
+                    logger.debug("Late packet discarded (%.3f s late)", -delta * period)
+                    return False
+                logger.warning("Timestamps went back %.2f s, restarting the plot", -delta * period)
+                self.restart_clock(timestamp[0])
+            elif delta > Settings.GAP_TOLERANCE:
+                n_lost = int(round(delta))
+                self.lost_samples += n_lost
+                logger.debug("%i samples lost (%i in total)", n_lost, self.lost_samples)
+                self.insert_gap(self.next_timestamp, timestamp[0])
+
+        self.next_timestamp = timestamp[-1] + period
+        return True
+
+    def restart_clock(self, timestamp: float) -> None:
+        """Discard the plotted data after a reset of the device clock and restart the time vector from a timestamp
 
-    def insert_new_data(self, data: dict, fft: bool = False, exg=None):
-        """Insert new data into plot vectors
+        Args:
+            timestamp (float): first timestamp of the new clock
+        """
+        # the offset is shared by all the models, only the first one detecting the reset moves it
+        if DataContainer.vis_time_offset is None or \
+                timestamp < DataContainer.vis_time_offset - Settings.MAX_PACKET_DELAY:
+            DataContainer.vis_time_offset = timestamp
+        self.buffer.fill()
+        self.pointer = 0
+        self.reset_ticks()
+        self.dirty = True
+
+    def insert_gap(self, t_start: float, t_end: float) -> None:
+        """Fill the buffer with NaNs for a range of missing data
 
         Args:
-            data (dict): data to insert
-            fft (bool, optional): whether data is for FFT plot. Defaults to False.
+            t_start (float): timestamp of the first missing sample
+            t_end (float): timestamp of the first sample after the gap
         """
-        # The parts commented out correspond to the implementation for handling the bluetooth drop
-
-        # if fft is False and data['t'][0] < DataContainer.last_t:
-        #     bt_drop = True
-        # else:
-        #     bt_drop = False
-        bt_drop = False
-        n_new_points = self.get_n_new_points(data)
-        idxs = np.arange(self.pointer, self.pointer + n_new_points)
-
-        if fft is False:
-            # if bt_drop and exg:
-            #     print(f"\n{data['t']=}")
-            #     print(f"{DataContainer.last_t=}")
-            #     a = np.arange(idxs[0] - 10, idxs[-1] + 10)
-            #     try:
-            #         print(f"Before adding: t={self.t_plot_data[a]}")
-            #     except:
-            #         pass
-
-            if bt_drop and exg:
-                # print(f"\n{data['t']=}")
-                # print(f"{DataContainer.last_t=}")
-                # print("drop")
-                # a = np.arange(idxs[0] - 10, idxs[-1] + 10)
-                # try:
-                #   print(f"Before adding: t={self.t_plot_data[a]}")
-                # except:
-                #     pass
-                try:
-                    i = np.where(self.t_plot_data < data['t'][0])[0][-1] + 1
-                    """
-                    Different approach. This one relies on inserting the delay packet on the original position
-                    idxs = np.arange(i, i+n_new_points)
-                    self.t_plot_data = np.insert(self.t_plot_data, idxs, data['t'])
-                    self.t_plot_data = self.t_plot_data[:-len(idxs)]"""
-                    self.pointer = i
-                    idxs = np.arange(self.pointer, self.pointer + n_new_points)
-                    # DataContainer.last_t = data['t'][-1]
-                except IndexError:
-                    print("IndexError - ", np.where(self.t_plot_data < data['t'][0]))
-
-            # Different approach. This one relies on the fact that the time between samples
-            # should be constant (0.004 for 8 chan)
-            # if len(self.t_plot_data[~np.isnan(self.t_plot_data)])>0 \
-            # and data['t'][0] - self.t_plot_data[~np.isnan(self.t_plot_data)][-1] > 0.005:
-            #     data['t'] = np.arange(self.t_plot_data[~np.isnan(self.t_plot_data)][-1], data['t'][0], 0.004)
-            #     idxs = np.arange(self.pointer, len(data['t']))
-
-            # else:
-            self.t_plot_data.put(idxs, data['t'], mode='wrap')  # replace values with new points
-
-            # if exg:
-            # if bt_drop and exg:
-            #   try:
-            #     print(f"After adding: t={self.t_plot_data[a]}")
-            #   except:
-            #     pass
-
-        for key, val in self.plot_data.items():
-            if bt_drop is True:
-                val.put(idxs, [np.NaN for i in range(n_new_points)], mode='wrap')
-            else:
-                try:
-                    val.put(idxs, data[key], mode='wrap')
-                # KeyError might happen when active chanels are changed
-                # if this happens, add nans instead of data coming from packet
-                except KeyError:
-                    val.put(idxs, [np.NaN for i in range(n_new_points)], mode='wrap')
+        length = len(self.buffer)
+        if length == 0:
+            return
+        # plot rate, gaps longer than the plot window are truncated
+        rate = length / self.timescale
+        n_gap = min(int((t_end - t_start) * rate), length)
+        if n_gap == 0:
+            return
+
+        t_gap = t_end - DataContainer.vis_time_offset - np.arange(n_gap, 0, -1) / rate
+        self.insert_new_data(np.full((self.buffer.n_chan, n_gap), np.nan), t_gap)
+        self.update_pointer(n_gap)
 
-    def update_pointer(self, data: list, signal=None, fft: bool = False) -> None:
+    def update_pointer(self, n_new_points: int, signal=None, fft: bool = False) -> None:
         """Update pointer and emit signal
 
         Args:
-            data (list): data from incoming packet
+            n_new_points (int): number of points in the incoming packet
             signal (PySide6 Signal, optional): Signal to emit when pointer is updated. Defaults to None.
             fft (bool, optional): Whether it is computing FFT. Defaults to False.
         """
-
         # update pointer by adding number of new points
-        self.pointer += self.get_n_new_points(data)
+        wrapped = self.buffer.advance(n_new_points)
 
         # pointer is bigger than length at the end of the screen,
         # then restart and emit corresponding signal
-        if self.pointer >= len(self.t_plot_data):
-            self.pointer -= len(self.t_plot_data)
-            if fft is False:
-                self.on_wrap(signal)
+        if wrapped and fft is False:
+            self.on_wrap(signal)
 
     def on_wrap(self, signal):
         """Actions to perform when pointer reaches end of the graph
@@ -235,6 +322,9 @@ class DataContainer(BaseModel):
         Args:
             signal (PySide6 Signal): signal to emit.
         """
+        # the time vector is not changed in moving mode, the plot range follows the newest sample
+        if self.plot_mode == PlotModes.MOVING:
+            return
         # Change time vector to view previous points by adding the time scale value
         self.t_plot_data[self.pointer:] += self.timescale
         # emit signal with smallest time point
@@ -242,35 +332,42 @@ class DataContainer(BaseModel):
         # if replotting markers, uncomment line below (may cause lagging, not completely tested)
         # self.signals.replotMkrAdd.emit(self.t_plot_data[0])
 
+    def reset_ticks(self) -> None:
+        """Emit the time axis ticks again on next update"""
+        self._ticks_key = None
+
     def new_t_axis(self, signal):
-        """
-        Update t-axis
+        """Update ticks of the time axis
+
+        Ticks are placed at integer seconds. Data after the position line belongs to the previous sweep, so its
+        ticks are labelled one timescale earlier, unless there is no data there yet (first sweep or buffer just
+        resized). Ticks only change when the second under the position line changes
+        or when a new sweep starts, so they are computed and emitted about once per second.
 
         Args:
-            t_vector (np.array): time vector
-            pointer (int): index with current position in time
+            signal (PySide6 Signal): signal to emit with the new ticks
         """
-        # as long as time vector is smaller than timescale no need to change
-        if np.nanmax(self.t_plot_data) < self.timescale:
+        # default ticks in moving mode
+        if len(self.buffer) == 0 or self.plot_mode == PlotModes.MOVING:
             return
+        t_now = self.t_plot_data[self.pointer - 1]
+        t_start = self.t_plot_data[0]
+        if np.isnan(t_now) or np.isnan(t_start):
+            return
+        t_next = self.t_plot_data[self.pointer] if self.pointer < len(self.buffer) else np.nan
+        shift = self.timescale if np.isfinite(t_next) else 0
 
-        # set time ticks based on time vector values
-        t_ticks = self.t_plot_data.copy()
-        t_ticks[self.pointer:] -= self.timescale
-
-        import warnings
-        warnings.filterwarnings(action='ignore', category=RuntimeWarning)
-        # suppress runtime warning for NaN
-        t_ticks = t_ticks.astype(int)
+        ticks_key = (math.floor(t_now), t_start, self.timescale, shift)
+        if ticks_key == self._ticks_key:
+            return
+        self._ticks_key = ticks_key
 
-        # number of points equals to one per second
-        l_points = int(len(self.t_plot_data) / int(self.timescale))
-        vals = self.t_plot_data[::l_points]
-        ticks = t_ticks[::l_points]
+        values = range(math.ceil(t_start), math.floor(t_start + self.timescale) + 1)
+        ticks = [(val, str(val if val <= t_now else int(val - shift))) for val in values]
 
         # Emit signal to update ticks
         try:
-            signal.emit([vals, ticks])
+            signal.emit(ticks)
         # RuntimeError might happen when the app closes
         except RuntimeError as error:
             logger.debug("RuntimeError: %s", str(error))
@@ -286,6 +383,8 @@ class BasePlots:
 
         self.lines = []
         self.plots_list = []
+        # rendering is suspended while the plot is not visible
+        self.visible = True
 
         self.set_dropdowns()
 
@@ -297,6 +396,26 @@ class BasePlots:
         """Returns data model"""
         return self.model
 
+    def refresh(self) -> None:
+        """Push the data accumulated since the last frame to the plot. Called by the render scheduler"""
+        self.model.process_queue()
+        # data stays dirty while the plot is hidden and is plotted when it becomes visible
+        if not self.visible or not self.model.dirty:
+            return
+        self.model.dirty = False
+        self.model.new_t_axis()
+        self.swipe_plot([self.model.t_plot_data, self.model.plot_data])
+        if self.model.plot_mode == PlotModes.MOVING:
+            self.move_t_range()
+
+    def set_visible(self, visible: bool) -> None:
+        """Set whether the plot is visible
+
+        Args:
+            visible (bool): whether the plot is visible
+        """
+        self.visible = visible
+
     @property
     def time_scale(self) -> int:
         """Returns timescale set in GUI
@@ -323,6 +442,7 @@ class BasePlots:
 
         # value_yaxis
         self.ui.value_yAxis.addItems(Settings.SCALE_MENU.keys())
+        self.ui.value_yAxis.addItem(Settings.AUTO_SCALE)
         self.ui.value_yAxis.setCurrentText("1 mV")
 
         # value_time_scale
@@ -338,11 +458,39 @@ class BasePlots:
         """swipping plot"""
         raise NotImplementedError
 
-    # TODO implement later and have option in gui
-    # @abstractmethod
-    # def moving_plot(self):
-    #     """moving window plot"""
-    #     raise NotImplementedError
+    def set_plot_mode(self, mode: PlotModes) -> None:
+        """Set sweep or moving window mode
+
+        In moving mode the time vector is never shifted and the plot range follows the newest sample, so the ring
+        buffer is displayed as is: the slice after the write head (oldest samples) on the left and the slice before
+        it on the right.
+
+        Args:
+            mode (PlotModes): new plot mode
+        """
+        self.model.set_plot_mode(mode)
+        for line in self.lines:
+            if line is not None:
+                line.setVisible(mode == PlotModes.SWEEP)
+        if mode == PlotModes.MOVING:
+            for plt in self.plots_list:
+                plt.getAxis('bottom').setTicks(None)
+        else:
+            self.set_t_range(self.model.window_start())
+
+    def move_t_range(self) -> None:
+        """Set plot x range so the newest sample is at the right edge (moving mode)"""
+        if len(self.model.buffer) == 0:
+            return
+        t_now = self.model.t_plot_data[self.model.pointer - 1]
+        if math.isnan(t_now):
+            return
+        for plt in self.plots_list:
+            try:
+                plt.setXRange(t_now - self.time_scale, t_now, padding=0)
+            # Exception coming from pyqtgraph library, can be ignored
+            except Exception:
+                pass
 
     def add_active_curves(self, all_curves: list, plot_widget: pg.PlotWidget) -> list:
         """Add curves from a list to a plot widget if the corresponding channel is active
@@ -381,6 +529,9 @@ class BasePlots:
         Args:
             data (float): minimum value for x range
         """
+        # range follows the newest sample in moving mode, see move_t_range
+        if self.model.plot_mode == PlotModes.MOVING:
+            return
         # t_min comes from the signal emitted from the model (on_wrap)
         t_min = data
         t_max = t_min + self.time_scale
@@ -396,46 +547,16 @@ class BasePlots:
         """Set ticks in plot x axis
 
         Args:
-            data (list): values and corresponding ticks
+            data (list): (value, label) pairs of the ticks
         """
-        # values and ticks come from signal emitted from the model (new_t_axis)
-        values, ticks = data
+        # ticks come from signal emitted from the model (new_t_axis)
         for plt in self.plots_list:
             try:
-                plt.getAxis('bottom').setTicks([[(t, str(tick)) for t, tick in zip(values, ticks)]])
+                plt.getAxis('bottom').setTicks([data])
             # AttributeError might happen closing the app (signal send but object already desctructed)
             except AttributeError:
                 pass
 
-    def _connection_vector(self, length, n_nans=10, id_th=None) -> np.array:
-        """Create connection vector to connect old and new data with a gap
-
-        Args:
-            length (int): length of the connection vector. Must be the same as the array to plot
-            id_th (int): threshold obtained when dev is disconnected
-            n_nans (int): number of nans to introduce
-
-        Returns:
-            np.array: connection vector with 0s and 1s
-        """
-        # connection vector contains all ones at the beggining (all points connected)
-        connection = np.full(length, 1)
-
-        # a gap is needed around the position line, indicated by the model pointer, so 0s are added
-        # the size of the gap is decided in the n_nans input parameter
-        connection[self.model.pointer - int(n_nans / 2): self.model.pointer + int(n_nans / 2)] = 0
-
-        # more zeros are added where the plot data is nan (we want to have gaps)
-        # this is especially relevant if adding nans when BT drops
-        first_key = list(self.model.plot_data.keys())[0]
-        idx_nan = np.argwhere(np.isnan(self.model.plot_data[first_key]))
-        idx_nan = np.delete(idx_nan, np.where(idx_nan >= [length]))
-        connection[idx_nan] = 0
-        if id_th is not None and id_th > 100:
-            connection[:id_th] = 0
-
-        return connection
-
     def _add_pos_line(self, t_vector: list) -> list:
         """
         Add position line to plot based on last value in the time vector
@@ -454,6 +575,7 @@ class BasePlots:
         if None in self.lines:
             for idx, plt in enumerate(self.plots_list):
                 self.lines[idx] = plt.addLine(pos, pen=Stylesheets.POS_LINE_COLOR)
+                self.lines[idx].setVisible(self.model.plot_mode == PlotModes.SWEEP)
         # afterwards only the position has to be updated
         else:
             for line in self.lines:
@@ -43,9 +43,6 @@ class SignalsContainer(QObject):
     pageChange = Signal(str)
 
     # Visualization
-    ornChanged = Signal(list)
-    exgChanged = Signal(list)
-
     tRangeORNChanged = Signal(float)
     tRangeEXGChanged = Signal(float)
     tAxisORNChanged = Signal(list)
@@ -56,10 +53,10 @@ class SignalsContainer(QObject):
 
     restartPlot = Signal()
 
-    mkrAdd = Signal(list)
     mkrPlot = Signal(list)
     replotMkrAdd = Signal(float)
     mkrRemove = Signal(float)
+    mkrClear = Signal()
 
     btDrop = Signal(bool)
 
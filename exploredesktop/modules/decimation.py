@@ -0,0 +1,243 @@
+"""Streaming decimators and level of detail reduction used to downsample ExG data for visualization"""
+import logging
+from abc import abstractmethod
+from typing import Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin
+
+
+from exploredesktop.modules.app_settings import Settings  # isort:skip
+
+
+logger = logging.getLogger("explorepy." + __name__)
+
+
+class BaseDecimator:
+    """Base class for streaming decimators
+
+    Args:
+        s_rate (int): input sampling rate
+        factor (int): decimation factor
+        n_chan (int): number of channels
+    """
+
+    def __init__(self, s_rate: int, factor: int, n_chan: int) -> None:
+        self.s_rate = s_rate
+        self.factor = max(int(factor), 1)
+        self.n_chan = n_chan
+
+    def accepts(self, s_rate: int, n_chan: int) -> bool:
+        """Whether the decimator can process data with the given sampling rate and number of channels
+
+        Args:
+            s_rate (int): sampling rate
+            n_chan (int): number of channels
+        """
+        return s_rate == self.s_rate and n_chan == self.n_chan
+
+    @abstractmethod
+    def process(self, time_vector: np.ndarray, exg: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Decimate a block of samples"""
+        raise NotImplementedError
+
+
+class PolyphaseDecimator(BaseDecimator):
+    """Stateful anti-aliased decimator for channels x samples blocks
+
+    A linear phase FIR low-pass filter is applied before keeping one out of `factor` samples. Only the kept
+    output samples are computed (polyphase decimation). The last input samples and the position of the next output
+    are carried across calls, so packets of any size can be processed without gaps or dropped samples.
+    Output timestamps are corrected for the filter delay.
+
+    Args:
+        s_rate (int): input sampling rate
+        factor (int): decimation factor
+        n_chan (int): number of channels
+    """
+
+    def __init__(self, s_rate: int, factor: int, n_chan: int) -> None:
+        super().__init__(s_rate, factor, n_chan)
+
+        if self.factor > 1:
+            n_taps = Settings.DECIMATION_TAPS_PER_FACTOR * self.factor + 1
+            # cutoff slightly below the output Nyquist frequency, relative to the input Nyquist frequency
+            self.taps = firwin(n_taps, Settings.DECIMATION_CUTOFF / self.factor)
+        else:
+            self.taps = np.ones(1)
+        # reversed taps so the filter is a dot product with each window of samples
+        self._kernel = self.taps[::-1].copy()
+        self.n_taps = len(self.taps)
+        # group delay of the filter in samples (odd number of taps)
+        self.delay = (self.n_taps - 1) // 2
+
+        self._history = None
+        self._t_history = None
+        # index of the next output sample relative to the first new sample
+        self._phase = 0
+
+    def _init_history(self, time_vector: np.ndarray, exg: np.ndarray) -> None:
+        """Initialize filter state with the first samples to avoid a transient at the beginning"""
+        n_hist = self.n_taps - 1
+        self._history = np.repeat(exg[:, :1], n_hist, axis=1).astype(float)
+        self._t_history = time_vector[0] - np.arange(n_hist, 0, -1) / self.s_rate
+        # first output is centered on the first sample
+        self._phase = self.delay
+
+    def process(self, time_vector: np.ndarray, exg: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Decimate a block of samples
+
+        Args:
+            time_vector (np.ndarray): time vector of the block
+            exg (np.ndarray): channels x samples block
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: decimated time vector and data. Might be empty for short packets
+        """
+        n_new = exg.shape[1]
+        if n_new == 0:
+            return time_vector, exg
+        if self._history is None:
+            self._init_history(time_vector, exg)
+
+        samples = np.concatenate((self._history, exg), axis=1)
+        t_samples = np.concatenate((self._t_history, time_vector))
+
+        # first sample of each window producing an output
+        starts = np.arange(self._phase, n_new, self.factor)
+
+        windows = sliding_window_view(samples, self.n_taps, axis=1)[:, starts]
+        exg_out = windows @ self._kernel
+        t_out = t_samples[starts + self.delay]
+
+        # keep state for next packet
+        n_hist = self.n_taps - 1
+        self._history = samples[:, -n_hist:] if n_hist else samples[:, :0]
+        self._t_history = t_samples[-n_hist:] if n_hist else t_samples[:0]
+        self._phase = self._phase + len(starts) * self.factor - n_new
+
+        return t_out, exg_out
+
+
+class EnvelopeDecimator(BaseDecimator):
+    """Min/max envelope decimator for channels x samples blocks
+
+    Samples are grouped in buckets of `factor` samples and the minimum and maximum of each bucket are kept, in the
+    order they occur, so the curve zig-zags between the extremes and short transients are never hidden. Two output
+    samples are produced per bucket. Incomplete buckets are carried across calls.
+
+    Args:
+        s_rate (int): input sampling rate
+        factor (int): number of samples per bucket
+        n_chan (int): number of channels
+    """
+
+    def __init__(self, s_rate: int, factor: int, n_chan: int) -> None:
+        super().__init__(s_rate, factor, n_chan)
+        self._pending = None
+        self._t_pending = None
+
+    def process(self, time_vector: np.ndarray, exg: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Decimate a block of samples
+
+        Args:
+            time_vector (np.ndarray): time vector of the block
+            exg (np.ndarray): channels x samples block
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: decimated time vector and data. Might be empty for short packets
+        """
+        if self._pending is not None:
+            exg = np.concatenate((self._pending, exg), axis=1)
+            time_vector = np.concatenate((self._t_pending, time_vector))
+
+        n_buckets = exg.shape[1] // self.factor
+        n_used = n_buckets * self.factor
+        self._pending = exg[:, n_used:]
+        self._t_pending = time_vector[n_used:]
+
+        buckets = exg[:, :n_used].reshape(exg.shape[0], n_buckets, self.factor)
+        idx_min = buckets.argmin(axis=2)[..., np.newaxis]
+        idx_max = buckets.argmax(axis=2)[..., np.newaxis]
+        v_min = np.take_along_axis(buckets, idx_min, axis=2)[..., 0]
+        v_max = np.take_along_axis(buckets, idx_max, axis=2)[..., 0]
+        min_first = (idx_min <= idx_max)[..., 0]
+
+        exg_out = np.empty((exg.shape[0], 2 * n_buckets))
+        exg_out[:, 0::2] = np.where(min_first, v_min, v_max)
+        exg_out[:, 1::2] = np.where(min_first, v_max, v_min)
+
+        # time vector is shared by all channels: extremes are placed at the start and the middle of the bucket
+        t_buckets = time_vector[:n_used].reshape(n_buckets, self.factor)
+        t_out = np.empty(2 * n_buckets)
+        t_out[0::2] = t_buckets[:, 0]
+        t_out[1::2] = t_buckets[:, self.factor // 2]
+
+        return t_out, exg_out
+
+
+def lod_bucket_size(n_points: int, width: float) -> int:
+    """Number of samples per pixel column of the plot
+
+    Args:
+        n_points (int): number of points in the plot window
+        width (float): width of the view in pixels
+
+    Returns:
+        int: bucket size. Reduction is only useful for buckets larger than two samples (min and max are kept)
+    """
+    if width <= 0:
+        return 1
+    bucket = int(n_points // width)
+    return bucket if bucket > 2 else 1
+
+
+def minmax_lod(
+    time_vector: np.ndarray, data: np.ndarray, connection: np.ndarray, bucket: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Reduce a plot window to the min and max of each bucket of samples (one bucket per pixel column)
+
+    Args:
+        time_vector (np.ndarray): time vector of the window
+        data (np.ndarray): channels x samples window
+        connection (np.ndarray): connection vector of the window
+        bucket (int): number of samples per bucket
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: reduced time vector, data and connection vector
+    """
+    if bucket <= 2:
+        return time_vector, data, connection
+
+    n_chan, length = data.shape
+    n_buckets = length // bucket
+    n_used = n_buckets * bucket
+
+    buckets = data[:, :n_used].reshape(n_chan, n_buckets, bucket)
+    # NaNs are picked by argmin/argmax, the connection vector disconnects them
+    idx_min = buckets.argmin(axis=2)[..., np.newaxis]
+    idx_max = buckets.argmax(axis=2)[..., np.newaxis]
+    v_min = np.take_along_axis(buckets, idx_min, axis=2)[..., 0]
+    v_max = np.take_along_axis(buckets, idx_max, axis=2)[..., 0]
+    min_first = (idx_min <= idx_max)[..., 0]
+
+    data_out = np.empty((n_chan, 2 * n_buckets + length - n_used), dtype=data.dtype)
+    data_out[:, 0:2 * n_buckets:2] = np.where(min_first, v_min, v_max)
+    data_out[:, 1:2 * n_buckets:2] = np.where(min_first, v_max, v_min)
+    data_out[:, 2 * n_buckets:] = data[:, n_used:]
+
+    t_buckets = time_vector[:n_used].reshape(n_buckets, bucket)
+    t_out = np.empty(2 * n_buckets + length - n_used, dtype=time_vector.dtype)
+    t_out[0:2 * n_buckets:2] = t_buckets[:, 0]
+    t_out[1:2 * n_buckets:2] = t_buckets[:, bucket // 2]
+    t_out[2 * n_buckets:] = time_vector[n_used:]
+
+    # a bucket is disconnected if any of its samples is
+    conn_buckets = connection[:n_used].reshape(n_buckets, bucket).min(axis=1)
+    conn_out = np.empty(2 * n_buckets + length - n_used, dtype=connection.dtype)
+    conn_out[0:2 * n_buckets:2] = conn_buckets
+    conn_out[1:2 * n_buckets:2] = conn_buckets
+    conn_out[2 * n_buckets:] = connection[n_used:]
+
+    return t_out, data_out, conn_out
@@ -1,7 +1,7 @@
 """ExG visualization module"""
 import logging
+from typing import Tuple
 
-import explorepy
 import numpy as np
 import pyqtgraph as pg
 from explorepy.tools import HeartRateEstimator
@@ -14,17 +14,33 @@ from PySide6.QtCore import (
 from exploredesktop.modules.app_settings import (  # isort:skip
     ConnectionStatus,
     DataAttributes,
+    DecimationModes,
     EnvVariables,
     ExGModes,
     Messages,
+    PlotModes,
     Settings,
     Stylesheets,
     VisModes
 )
+from exploredesktop.modules.auto_scale import AmplitudeEstimator  # isort:skip
 from exploredesktop.modules.base_data_module import (  # isort:skip
     BasePlots,
     DataContainer
 )
+from exploredesktop.modules.decimation import (  # isort:skip
+    EnvelopeDecimator,
+    PolyphaseDecimator,
+    lod_bucket_size,
+    minmax_lod
+)
+from exploredesktop.modules.explore_interface import ExGBlock  # isort:skip
+from exploredesktop.modules.history_store import HistoryStore  # isort:skip
+from exploredesktop.modules.render_module import (  # isort:skip
+    MultiCurveItem,
+    SweepRenderer,
+    channel_transform
+)
 from exploredesktop.modules.utils import _remove_old_plot_item, display_msg   # isort:skip
 
 
@@ -42,6 +58,7 @@ visualization_option = 5
 
 class ExGData(DataContainer):
     """_summary_"""
+    connection_gap = 5
 
     def __init__(self, filters) -> None:
         super().__init__()
@@ -52,9 +69,17 @@ class ExGData(DataContainer):
         self.offsets = np.array([])
         self.y_unit = Settings.DEFAULT_SCALE
         self.y_string = '1 mV'
+        # per channel gain fitted to the amplitude of each channel, only used in auto scale
+        self.auto_scale = False
+        self.amplitude = None
+        self.gain_average = None
+        self.chan_gain = None
         # DataContainer.last_t = 0
 
         self.packet_count = 0
+        self.decimator = None
+        # long history for pause and review, created when data is received
+        self.history = None
         self.t_bt_drop = None
         self.bt_drop_warning_displayed = False
 
@@ -65,6 +90,9 @@ class ExGData(DataContainer):
 
         self.mode = ExGModes.EEG
         self.vis_mode = VisModes.SCROLL
+        self.decimation_mode = DecimationModes.FILTER
+        # whether the whole plot window has changed since the last render
+        self.full_redraw = True
 
         # start bt drop detection timer
         self.timer = QTimer()
@@ -78,9 +106,15 @@ class ExGData(DataContainer):
         self.offsets = np.array([])
         self.y_unit = Settings.DEFAULT_SCALE
         self.y_string = '1 mV'
+        self.auto_scale = False
+        self.amplitude = None
+        self.gain_average = None
+        self.chan_gain = None
         # DataContainer.last_t = 0
 
         self.packet_count = 0
+        self.decimator = None
+        self.close_history()
         self.t_bt_drop = None
         self.bt_drop_warning_displayed = False
 
@@ -91,17 +125,27 @@ class ExGData(DataContainer):
 
         DataContainer.vis_time_offset = None
         self.pointer = 0
+        self.queue.clear()
+        # data from the previous session is not kept on next resize
+        self._buffer_rate = None
+
+        self.next_timestamp = None
+        self.lost_samples = 0
+        self.late_packets = 0
 
     def new_t_axis(self, signal=None):
         signal = self.signals.tAxisEXGChanged
         return super().new_t_axis(signal)
 
-    def update_pointer(self, data, signal=None, fft=False):
+    def update_pointer(self, n_new_points, signal=None, fft=False):
         signal = self.signals.tRangeEXGChanged
-        return super().update_pointer(data, signal)
+        return super().update_pointer(n_new_points, signal)
 
     def on_wrap(self, signal):
         super().on_wrap(signal)
+        # time vector of the old data has been shifted
+        if self.plot_mode == PlotModes.SWEEP:
+            self.full_redraw = True
         # if self.mode == ExGModes.ECG:
         #     self.remove_r_peak()
         #     self.add_r_peaks_replot()
@@ -126,16 +170,21 @@ class ExGData(DataContainer):
         Args:
             attributes (list): list of attributes to update
         """
+        if DataAttributes.OFFSETS in attributes or DataAttributes.DATA in attributes:
+            # channel settings might have changed, rebuild active channel layout on next access
+            self.explorer.invalidate_chan_layout()
+
         if DataAttributes.OFFSETS in attributes:
 
             n_chan = self.explorer.n_active_chan
             # pyqtgraph starts plotting at the bottom, we want to add ch at the top of the plot -> reversed
+            # offsets are stored as a column vector, one row per channel of the buffer
             # if visualization_option in [2, 3, 4, 5, 6]:
             if self.vis_mode == VisModes.FULL:
-                self.offsets = [i for i in reversed(np.arange(0.5, (n_chan + 1) / 2, 0.5)[:, np.newaxis].astype(float))]
+                self.offsets = np.arange(0.5, (n_chan + 1) / 2, 0.5)[::-1, np.newaxis].astype(float)
             # elif visualization_option in [1, 7]:
             elif self.vis_mode == VisModes.SCROLL:
-                self.offsets = [i for i in reversed(np.arange(1, n_chan + 1)[:, np.newaxis].astype(float))]
+                self.offsets = np.arange(1, n_chan + 1)[::-1, np.newaxis].astype(float)
 
         if DataAttributes.BASELINE in attributes:
             self._baseline = None
@@ -143,12 +192,24 @@ class ExGData(DataContainer):
         if DataAttributes.DATA in attributes:
             active_chan = self.explorer.active_chan_list()
             points = self.plot_points()
-            self.plot_data = {ch: np.array([np.NaN] * points) for ch in active_chan}
-            self.t_plot_data = np.array([np.NaN] * points)
+            self.resize_buffer(active_chan, points)
 
         if DataAttributes.POINTER in attributes:
             self.pointer = 0
 
+    def display_transform(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns gain and offset of each channel, the plot displays offset + gain * data
+
+        The buffer keeps the data in uV, scale and channel offsets are only applied by the plot.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: column vectors with the gain and the offset of each channel
+        """
+        if self.auto_scale and self.chan_gain is not None and self.chan_gain.shape == self.offsets.shape:
+            return self.chan_gain.copy(), self.offsets
+        gain = np.full(self.offsets.shape, 1 / self.y_unit)
+        return gain, self.offsets
+
     def handle_disconnection(self, timestamp: list) -> None:
         """Handle disconnection errors
 
@@ -176,86 +237,193 @@ class ExGData(DataContainer):
             connection_label = ConnectionStatus.CONNECTED.value.replace("dev_name", self.explorer.device_name)
             self.signals.devInfoChanged.emit({EnvVariables.DEVICE_NAME: connection_label})
 
-    def callback(self, packet: explorepy.packet.EEG) -> None:
-        """Callback to get EEG data
+    def callback(self, block: ExGBlock) -> None:
+        """Callback to get EEG data. Runs in the explorepy thread, data is only queued
 
         Args:
-            packet (explorepy.packet.EEG): EEG packet
+            block (ExGBlock): decoded EEG packet with active channels only
         """
-        chan_list = self.explorer.active_chan_list()
-        exg_fs = self.explorer.sampling_rate
-        timestamp, exg = packet.get_data(exg_fs)
+        self.queue.put(block)
+
+    def ingest(self, item: ExGBlock) -> None:
+        """Process EEG data and add it to the buffer
 
-        # Remove channels not active
-        exg = np.array([e for e, val in zip(exg, self.explorer.chan_mask) if val])
+        Args:
+            item (ExGBlock): decoded EEG packet with active channels only
+        """
+        exg_fs = self.explorer.sampling_rate
+        timestamp, exg = item
 
         # self.handle_disconnection(timestamp)
         # From timestamp to seconds
         if DataContainer.vis_time_offset is None:
             DataContainer.vis_time_offset = timestamp[0]
 
+        self.packet_count += 1
+        if not self.check_timestamps(timestamp, exg_fs):
+            return
+
         time_vector = timestamp - DataContainer.vis_time_offset
 
         # Downsampling
         if Settings.DOWNSAMPLING:
             time_vector, exg = self.downsampling(time_vector, exg, exg_fs)
+            # short packets might not produce any output sample
+            if time_vector.size == 0:
+                return
 
         # Baseline Correction
         if self.filters.current_filters is not None and self.filters.current_filters['offset']:
             exg = self.baseline_correction(exg)
 
-        # ValueError thrown when changing the channels. Can be ignored
-        try:
-            exg = self.update_unit(exg)
-        except ValueError as error:
-            logger.warning("ValueError: %s", str(error))
+        if self.auto_scale:
+            self.update_auto_gain(exg)
 
-        # pyqtgraph starts plotting at the bottom, we want to add ch at the top of the plot -> reversed
-        data = dict(zip(reversed(chan_list), reversed(exg)))
-        data['t'] = time_vector
+        self.add_to_history(time_vector, exg)
 
-        self.insert_new_data(data, exg=True)
-        self.update_pointer(data)
-        self.new_t_axis()
+        self.insert_new_data(exg, time_vector)
+        self.update_pointer(len(time_vector))
 
-        DataContainer.last_t = data['t'][-1]
-        self.packet_count += 1
+        DataContainer.last_t = time_vector[-1]
 
-        try:
-            self.signals.exgChanged.emit([self.t_plot_data, self.plot_data])
-        # RuntimeError might happen when the app closes
-        except RuntimeError as error:
-            logger.debug("RuntimeError: %s", str(error))
+        # plot is updated by the render scheduler
+        self.dirty = True
 
-    def downsampling(self, time_vector, exg, exg_fs):
-        """Downsample"""
-        # Correct packet for 4 chan device
-        if len(time_vector) == 33 and self.decide_drop(exg_fs):
-            exg = exg[:, 1:]
-            time_vector = time_vector[1:]
+    def add_to_history(self, time_vector: np.ndarray, exg: np.ndarray) -> None:
+        """Add data to the long history store
+
+        Args:
+            time_vector (np.ndarray): time vector
+            exg (np.ndarray): channels x samples exg data
+        """
+        channels = self.buffer.channels
+        # channels might be out of sync while the channel mask is being changed
+        if exg.shape[0] != len(channels) or len(self.buffer) == 0:
+            return
+        rate = len(self.buffer) / self.timescale
+        if self.history is None or not self.history.accepts(channels, rate):
+            self.close_history()
+            # all the inputs are kept, so the history is not lost when the active channels change
+            self.history = HistoryStore(self.explorer.full_chan_list(custom_name=False), rate)
+        self.history.append(time_vector, exg, channels)
 
-        # Downsample
-        exg = exg[:, ::int(exg_fs / Settings.EXG_VIS_SRATE)]
-        time_vector = time_vector[::int(exg_fs / Settings.EXG_VIS_SRATE)]
-        return time_vector, exg
+    def update_auto_gain(self, exg: np.ndarray) -> None:
+        """Update the amplitude estimate of each channel and the gain fitting it to the channel spacing
 
-    def decide_drop(self, exg_fs: int) -> bool:
-        """Decide whether to drop a data point from the packet based on the sampling rate
+        The gain fitting the amplitude is averaged with an exponential moving average, so the channels are rescaled
+        smoothly. The gain of a channel only changes when the average differs more than Settings.AUTO_SCALE_TOLERANCE
+        from the current one, so the plot is not rescaled on every packet.
+
+        Args:
+            exg (np.ndarray): channels x samples exg data
+        """
+        n_chan = exg.shape[0]
+        # channels might be out of sync while the channel mask is being changed
+        if n_chan != len(self.offsets) or len(self.buffer) == 0:
+            return
+        rate = len(self.buffer) / self.timescale
+        if self.amplitude is None or not self.amplitude.accepts(rate, n_chan):
+            self.amplitude = AmplitudeEstimator(rate, n_chan, self.timescale)
+            self.gain_average = None
+            self.chan_gain = None
+        # amplitude follows the visible window
+        self.amplitude.window = self.timescale
+        self.amplitude.update(exg)
+
+        # channels without data yet (NaN) get the minimum amplitude
+        amplitude = np.fmax(self.amplitude.amplitude, Settings.AUTO_SCALE_MIN_AMPLITUDE)
+        spacing = 0.5 if self.vis_mode == VisModes.FULL else 1.
+        target = (Settings.AUTO_SCALE_FILL * spacing / amplitude)[:, np.newaxis]
+        if self.chan_gain is None or self.chan_gain.shape != target.shape:
+            self.gain_average = target
+            self.chan_gain = target.copy()
+            return
+        alpha = min(exg.shape[1] / (rate * Settings.AUTO_SCALE_TIME_CONSTANT), 1.)
+        self.gain_average += alpha * (target - self.gain_average)
+        rescale = np.abs(self.gain_average - self.chan_gain) > Settings.AUTO_SCALE_TOLERANCE * self.chan_gain
+        self.chan_gain[rescale] = self.gain_average[rescale]
+
+    def close_history(self) -> None:
+        """Discard the long history store and its temporary file"""
+        if getattr(self, "history", None) is not None:
+            self.history.close()
+        self.history = None
+
+    def downsampling(self, time_vector, exg, exg_fs):
+        """Low-pass filter and downsample to Settings.EXG_VIS_SRATE
 
         Args:
+            time_vector (np.ndarray): time vector of the packet
+            exg (np.ndarray): channels x samples exg data
             exg_fs (int): sampling rate
 
         Returns:
-            bool: whether to drop a data point
+            tuple: decimated time vector and exg data
         """
-        drop = True
-        if exg_fs == 1000 and self.packet_count % 8 == 0:
-            drop = False
-        elif exg_fs == 500 and self.packet_count % 4 == 0:
-            drop = False
-        elif exg_fs == 250 and self.packet_count % 2 == 0:
-            drop = False
-        return drop
+        factor = int(exg_fs / Settings.EXG_VIS_SRATE)
+        # filter state is kept across packets, a new decimator is needed if the stream settings change
+        if self.decimator is None or not self.decimator.accepts(exg_fs, exg.shape[0]):
+            if self.decimation_mode == DecimationModes.ENVELOPE:
+                self.decimator = EnvelopeDecimator(exg_fs, factor, exg.shape[0])
+            else:
+                self.decimator = PolyphaseDecimator(exg_fs, factor, exg.shape[0])
+        return self.decimator.process(time_vector, exg)
+
+    def insert_gap(self, t_start: float, t_end: float) -> None:
+        """Fill the buffer with NaNs for a range of missing data
+
+        Args:
+            t_start (float): timestamp of the first missing sample
+            t_end (float): timestamp of the first sample after the gap
+        """
+        super().insert_gap(t_start, t_end)
+        # decimator history is not contiguous with the next packet anymore
+        self.decimator = None
+
+    def restart_clock(self, timestamp: float) -> None:
+        """Discard the plotted data after a reset of the device clock and restart the time vector from a timestamp
+
+        Args:
+            timestamp (float): first timestamp of the new clock
+        """
+        super().restart_clock(timestamp)
+        # decimator and history are not contiguous with the next packet anymore
+        self.decimator = None
+        self.close_history()
+        DataContainer.last_t = timestamp - DataContainer.vis_time_offset
+        self.full_redraw = True
+        # markers of the previous clock are removed
+        self.signals.mkrClear.emit()
+        self.signals.tRangeEXGChanged.emit(DataContainer.last_t)
+
+    def plot_points(self, orn: bool = False, downsampling: bool = Settings.DOWNSAMPLING) -> int:
+        """Calculate number of points in the plot vectors. Envelope mode keeps two points (min and max) per bucket
+
+        Args:
+            orn (bool, optional): whether the plot is for ORN data. Defaults to False.
+            downsampling (bool, optional): whether to apply downsampling. Defaults to Settings.DOWNSAMPLING.
+
+        Returns:
+            int: number of points
+        """
+        points = super().plot_points(orn, downsampling)
+        if downsampling and self.decimation_mode == DecimationModes.ENVELOPE:
+            points *= 2
+        return points
+
+    def set_decimation_mode(self, mode: DecimationModes) -> None:
+        """Set downsampling mode and reallocate the plot data
+
+        Args:
+            mode (DecimationModes): new downsampling mode
+        """
+        if mode == self.decimation_mode:
+            return
+        logger.debug("Decimation mode has been changed to %s", mode.value)
+        self.decimation_mode = mode
+        self.decimator = None
+        self.signals.tRangeEXGChanged.emit(DataContainer.last_t)
+        self.update_attributes([DataAttributes.POINTER, DataAttributes.DATA])
 
     def baseline_correction(self, exg):
         """baseline correction"""
@@ -275,87 +443,27 @@ class ExGData(DataContainer):
 
         return exg
 
-    def update_unit(self, exg):
-        """Update exg signal to match selected scale
-
-        Args:
-            exg (list): exg signal
-
-        Returns:
-            list: scaled exg signal
-        """
-        exg = self.offsets + exg / self.y_unit
-        return exg
-
     def change_timescale(self):
         """Change time scale"""
         super().change_timescale()
-        self.signals.tRangeEXGChanged.emit(DataContainer.last_t)
-        self.signals.updateDataAttributes.emit([DataAttributes.POINTER, DataAttributes.DATA])
+        self.signals.updateDataAttributes.emit([DataAttributes.DATA])
+        self.signals.tRangeEXGChanged.emit(self.window_start())
 
     @Slot(str)
     def change_scale(self, new_val: str):
         """
         Change y-axis scale in ExG plot
         """
-        old = Settings.SCALE_MENU[self.y_string]
-        new = Settings.SCALE_MENU[new_val]
         logger.debug("ExG scale has been changed from %s to %s", self.y_string, new_val)
-
-        old_unit = 10 ** (-old)
-        new_unit = 10 ** (-new)
-
         self.y_string = new_val
-        self.y_unit = new_unit
-
-        self.rescale_signal(old_unit, new_unit)
-        # TODO
-        # # Rescale r_peaks
-        self.rescale_peaks(old_unit)
-
-        self.r_peak_replot['r_peak'] = list((np.array(self.r_peak_replot['r_peak']) - self.offsets[0]
-                                             ) * (old_unit / self.y_unit) + self.offsets[0])
-        self.rescale_peaks(old_unit, replot=True)
+        self.auto_scale = new_val == Settings.AUTO_SCALE
+        if not self.auto_scale:
+            self.y_unit = 10 ** (-Settings.SCALE_MENU[new_val])
 
+        # data and r peaks are not rescaled, the plot applies the new gain (see display_transform)
         # Update acis
         self.signals.updateYAxis.emit()
 
-    def rescale_signal(self, old_unit, new_unit):
-        """Rescale signal
-
-        Args:
-            old_unit (float): old axis unit
-            new_unit (float): new axis unit
-        """
-        chan_list = self.explorer.active_chan_list()
-        for chan, value in self.plot_data.items():
-            if chan in chan_list:
-                temp_offset = self.offsets[chan_list.index(chan)]
-                self.plot_data[chan] = (value - temp_offset) * (old_unit / new_unit) + temp_offset
-
-    def rescale_peaks(self, old_unit, replot=False):
-        """Rescale plotted peaks
-
-        Args:
-            old_unit (float): old y axis unit
-            replot (bool, optional): Whether to rescale replotted peaks. Defaults to False.
-        """
-        if replot is False:
-            r_peak_dict = self.r_peak
-        else:
-            r_peak_dict = self.r_peak_replot
-
-        r_peak_dict['r_peak'] = list(
-            (np.array(r_peak_dict['r_peak']) - self.offsets[0]) * (old_unit / self.y_unit) + self.offsets[0])
-
-        self.signals.rrPeakRemove.emit(r_peak_dict['points'])
-        to_replot = r_peak_dict.copy()
-        r_peak_dict = {'t': [], 'r_peak': [], 'points': []}
-        # # Plot rescaled rpeaks
-        for i in range(len(to_replot['t'])):
-            self.signals.plotRR.emit(
-                [to_replot['t'][i], to_replot['r_peak'][i], replot])
-
     def obtain_r_peaks(self):
         """Obtain RR peaks"""
         if self.mode == ExGModes.EEG:
@@ -371,7 +479,7 @@ class ExGData(DataContainer):
         start = start if start >= 0 else 0
         end = self.pointer if start + self.pointer >= (2 * s_rate) else (2 * s_rate)
         # f = self.exg_pointer
-        ecg_data = (np.array(self.plot_data[first_chan])[start:end] - self.offsets[0]) * self.y_unit
+        ecg_data = np.array(self.plot_data[first_chan])[start:end]
         time_vector = np.array(self.t_plot_data)[start:end]
 
         # Check if the peak2peak value is bigger than threshold
@@ -385,8 +493,6 @@ class ExGData(DataContainer):
         except IndexError:
             return
 
-        self.peaks_val = (np.array(self.peaks_val) / self.y_unit) + self.offsets[0]
-
         if self.peaks_time:
             for i, pk_time in enumerate(self.peaks_time):
                 if pk_time not in self.r_peak['t']:
@@ -435,6 +541,7 @@ class ExGData(DataContainer):
         expected_packets = rec_time * self.explorer.sampling_rate / sample_per_packet
         logger.info("Total number of packets in recording (%f): %i" % (rec_time, n_packets))
         logger.info("Expected number of packets in recording (%f): %i" % (rec_time, expected_packets))
+        logger.info("Samples lost during the session: %i", self.lost_samples)
 
         percentage_recieved = round(n_packets * 100 / expected_packets)
         percentage_recieved = percentage_recieved if percentage_recieved <= 100 else 100
@@ -470,6 +577,16 @@ class ExGPlot(BasePlots):
 
         self.plots_list = [self.ui.plot_exg]
 
+        # level of detail: samples per pixel column of the plot
+        self.lod_bucket = 1
+        self._lod_points = 0
+
+        self.sweep = SweepRenderer(self.ui.plot_exg, Stylesheets.EXG_LINE_COLOR)
+
+        # pause and review of the long history
+        self.paused = False
+        self.review_item = None
+
         self.timer = QTimer()
         self.bt_stability_check_timer = QTimer()
 
@@ -478,6 +595,10 @@ class ExGPlot(BasePlots):
 
         super().setup_ui_connections()
         self.ui.value_timeScale.currentTextChanged.connect(self.model.change_timescale)
+        self.ui.value_timeScale.currentTextChanged.connect(self.update_lod)
+        self.ui.plot_exg.getViewBox().sigResized.connect(self.update_lod)
+        self.ui.plot_exg.getViewBox().sigXRangeChanged.connect(self.update_review)
+        self.ui.plot_exg.getViewBox().sigYRangeChanged.connect(self.update_viewport)
         self.ui.value_yAxis.currentTextChanged.connect(self.model.change_scale)
         # TODO: this will depend on new chan dict
         # self.ui.value_signal.currentTextChanged.connect(self.change_signal_mode)
@@ -525,6 +646,7 @@ class ExGPlot(BasePlots):
 
     def reset_vars(self) -> None:
         """Reset variables"""
+        self.set_paused(False)
         self.lines = [None]
         self.plots_list = [self.ui.plot_exg]
         self.bt_drop_warning_displayed = False
@@ -554,9 +676,8 @@ class ExGPlot(BasePlots):
         # Add range of time axis
         self._setup_plot_range(plot_wdgt)
 
-        all_curves_list = [
-            pg.PlotCurveItem(pen=Stylesheets.EXG_LINE_COLOR) for i in range(self.model.explorer.device_chan)]
-        self.active_curves_list = self.add_active_curves(all_curves_list, plot_wdgt)
+        # curves are created by the sweep renderer for the active channels
+        self.sweep.reset()
 
         self.setup_scrollbar()
         # if visualization_option in [4, 5] or self.model.explorer.device_chan < 9:
@@ -570,6 +691,8 @@ class ExGPlot(BasePlots):
         n_chan = self.model.explorer.n_active_chan
         print(f"{n_chan=}")
         timescale = self.time_scale
+        # data kept in the buffer (e.g. after a channel change) is displayed where it was
+        t_start = self.model.window_start(default=0)
         value = self.ui.verticalScrollBar.value()
 
         if self.model.explorer.device_chan < 9:
@@ -584,7 +707,7 @@ class ExGPlot(BasePlots):
         print(f"{y_range=}")
         plot_wdgt.setRange(
             yRange=y_range,
-            xRange=(0, int(timescale)), padding=0.01)
+            xRange=(t_start, t_start + int(timescale)), padding=0.01)
         plot_wdgt.setLabel('bottom', 'time (s)')
 
     def _setup_righ_axis(self, plot_wdgt: pg.PlotWidget):
@@ -657,21 +780,30 @@ class ExGPlot(BasePlots):
 
     @Slot(dict)
     def swipe_plot(self, data):
-        t_vector, plot_data = data
+        t_vector, _ = data
 
         # position line
         self._add_pos_line(t_vector)
 
-        # connection vector
-        connection = self._connection_vector(len(t_vector))
+        # connection vector is maintained by the buffer
+        connection = self.model.buffer.connect
 
-        # Paint curves
-        for curve, chan in zip(self.active_curves_list, self.model.explorer.active_chan_list()):
-            try:
-                curve.setData(t_vector, plot_data[chan], connect=connection)
-            # KeyError might happen when (de)activating channels during visualization
-            except KeyError:
-                pass
+        # only feed the curves with the points that can be displayed
+        if len(t_vector) != self._lod_points:
+            self.update_lod()
+
+        # scale and offsets are applied by the curve items, auto scale might change them on any packet
+        self.apply_scale()
+        # channels scrolled out of the view are not rendered
+        self.sweep.set_channel_mask(self.viewport_channels())
+
+        # Paint curves, only the segments with new data are rebuilt
+        if self.model.full_redraw:
+            self.sweep.invalidate()
+            self.model.full_redraw = False
+        self.sweep.render(
+            t_vector, self.model.buffer.data, connection, self.model.pointer, self.model.buffer.n_written,
+            gap=self.model.connection_gap, lod_bucket=self.lod_bucket)
 
         # remove reploted markers
         self.model.signals.mkrRemove.emit(self.model.last_t)
@@ -684,6 +816,172 @@ class ExGPlot(BasePlots):
         self.model.r_peak_replot, to_remove_replot = self.model.remove_rpeaks(
             self.model.r_peak_replot, to_remove_replot)
 
+    def refresh(self) -> None:
+        """Push the new data to the plot. Data is only ingested while the plot is paused"""
+        if self.paused:
+            self.model.process_queue()
+            return
+        super().refresh()
+
+    @Slot(float)
+    def set_t_range(self, data: float) -> None:
+        """Set plot x range. Ignored while the plot is paused
+
+        Args:
+            data (float): minimum value for x range
+        """
+        if self.paused:
+            return
+        super().set_t_range(data)
+
+    @Slot(list)
+    def set_t_axis(self, data: list) -> None:
+        """Set ticks in plot x axis. Ignored while the plot is paused
+
+        Args:
+            data (list): (value, label) pairs of the ticks
+        """
+        if self.paused:
+            return
+        super().set_t_axis(data)
+
+    def set_plot_mode(self, mode: PlotModes) -> None:
+        """Set sweep or moving window mode
+
+        Args:
+            mode (PlotModes): new plot mode
+        """
+        super().set_plot_mode(mode)
+        self.sweep.set_moving(mode == PlotModes.MOVING)
+
+    def set_visible(self, visible: bool) -> None:
+        """Set whether the plot is visible. All the segments are redrawn when it is shown again
+
+        Args:
+            visible (bool): whether the plot is visible
+        """
+        if visible and not self.visible:
+            self.sweep.invalidate()
+            self.model.dirty = True
+        super().set_visible(visible)
+
+    @Slot(bool)
+    def set_paused(self, paused: bool) -> None:
+        """Pause the sweep to review the long history, or go back to live data
+
+        While paused, data keeps being received and the plot can be dragged horizontally to scroll back in time.
+
+        Args:
+            paused (bool): whether to pause the plot
+        """
+        if paused == self.paused:
+            return
+        self.paused = paused
+        plot_wdgt = self.ui.plot_exg
+        view_box = plot_wdgt.getViewBox()
+
+        self.sweep.set_visible(not paused)
+        for line in self.lines:
+            if line is not None:
+                line.setVisible(not paused and self.model.plot_mode == PlotModes.SWEEP)
+
+        if paused:
+            if self.review_item is None:
+                self.review_item = MultiCurveItem([pg.mkPen(Stylesheets.EXG_LINE_COLOR)])
+            plot_wdgt.addItem(self.review_item)
+            # history is plotted against its own time, default ticks are used
+            plot_wdgt.getAxis('bottom').setTicks(None)
+            plot_wdgt.setMouseEnabled(x=True, y=False)
+
+            t_range = self.model.history.t_range if self.model.history is not None else None
+            if t_range is not None:
+                view_box.setLimits(xMin=t_range[0], xMax=t_range[1])
+                plot_wdgt.setXRange(max(t_range[1] - self.time_scale, t_range[0]), t_range[1], padding=0)
+            self.update_review()
+            logger.debug("ExG plot paused")
+        else:
+            if self.review_item is not None:
+                plot_wdgt.removeItem(self.review_item)
+            plot_wdgt.setMouseEnabled(x=False, y=False)
+            view_box.setLimits(xMin=None, xMax=None)
+
+            # back to the live sweep
+            super().set_t_range(self.model.window_start())
+            self.model.reset_ticks()
+            self.sweep.invalidate()
+            self.model.dirty = True
+            logger.debug("ExG plot resumed")
+
+    def update_review(self) -> None:
+        """Plot the history in the visible time range while the plot is paused"""
+        history = self.model.history
+        if not self.paused or self.review_item is None or history is None:
+            return
+        view_box = self.ui.plot_exg.getViewBox()
+        t_min, t_max = view_box.viewRange()[0]
+        channels = self.model.buffer.channels
+        gain, offsets = self.model.display_transform()
+        if not history.accepts(channels, history.s_rate) or offsets.shape[:1] != (len(channels),):
+            self.review_item.setData(np.empty(0), np.empty((0, 0)), np.empty(0, dtype=np.int32))
+            return
+        t_vector, exg = history.get(t_min, t_max, channels)
+        # channels that were not active in the range are not drawn
+        shown = np.flatnonzero(np.isfinite(exg).any(axis=1))
+        if len(t_vector) == 0 or len(shown) == 0:
+            self.review_item.setData(np.empty(0), np.empty((0, 0)), np.empty(0, dtype=np.int32))
+            return
+        exg = exg[shown]
+
+        connection = np.isfinite(exg).all(axis=0).astype(np.int32)
+        # missing samples between packets
+        connection[:-1][np.diff(t_vector) > 1.5 / history.s_rate] = 0
+
+        bucket = lod_bucket_size(len(t_vector), view_box.width())
+        t_vector, exg, connection = minmax_lod(t_vector, exg, connection, bucket)
+        self.review_item.setData(t_vector, offsets[shown] + gain[shown] * exg, connection, channels=shown)
+
+    def apply_scale(self) -> None:
+        """Apply the scale and channel offsets of the model to the curves and r peaks if they have changed"""
+        gain, offsets = self.model.display_transform()
+        if not self.sweep.set_scale(gain, offsets) or not len(offsets):
+            return
+        transform = channel_transform(gain[0, 0], offsets[0, 0])
+        for point in self.model.r_peak['points'] + self.model.r_peak_replot['points']:
+            point.setTransform(transform)
+
+    @Slot()
+    def update_scale(self) -> None:
+        """Apply the scale and channel offsets of the model to the plot items. Data is not modified"""
+        self.apply_scale()
+        self.update_review()
+        self.model.dirty = True
+
+    def viewport_channels(self) -> np.ndarray:
+        """Channels in the visible y range, plus Settings.VIEWPORT_MARGIN channels above and below
+
+        Returns:
+            np.ndarray: boolean mask with one value per channel
+        """
+        offsets = np.ravel(self.model.offsets)
+        y_min, y_max = self.ui.plot_exg.getViewBox().viewRange()[1]
+        in_view = np.flatnonzero((offsets >= y_min) & (offsets <= y_max))
+        mask = np.zeros(len(offsets), dtype=bool)
+        if len(in_view):
+            mask[max(in_view[0] - Settings.VIEWPORT_MARGIN, 0):in_view[-1] + Settings.VIEWPORT_MARGIN + 1] = True
+        return mask
+
+    @Slot()
+    def update_viewport(self) -> None:
+        """Render the channels scrolled into view on next frame. Their curves are caught up from the buffer"""
+        self.model.dirty = True
+
+    def update_lod(self) -> None:
+        """Update the level of detail from the width of the plot in pixels and the number of points in the window"""
+        self._lod_points = len(self.model.buffer)
+        width = self.ui.plot_exg.getViewBox().width()
+        self.lod_bucket = lod_bucket_size(self._lod_points, width)
+        logger.debug("ExG plot level of detail: %i samples per pixel", self.lod_bucket)
+
     @Slot(bool)
     def display_bt_drop(self, bt_drop: bool) -> None:
         """Display bluetooth drop warning
@@ -718,6 +1016,10 @@ class ExGPlot(BasePlots):
         point = self.ui.plot_exg.plot(
             [t_point], [r_peak], pen=None,
             symbolBrush=brush, symbol='o', symbolSize=8)
+        # r peaks are in uV, they are displayed on the first channel
+        gain, offsets = self.model.display_transform()
+        if len(offsets):
+            point.setTransform(channel_transform(gain[0, 0], offsets[0, 0]))
 
         if t_point not in r_peak_dict:
             r_peak_dict['t'].append(t_point)
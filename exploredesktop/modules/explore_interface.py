@@ -5,12 +5,14 @@ from collections import namedtuple
 from typing import (
     Callable,
     List,
+    NamedTuple,
     Optional,
     Tuple,
     Union
 )
 
 import explorepy.packet
+import numpy as np
 from explorepy import Explore
 from explorepy.settings_manager import SettingsManager
 from explorepy.stream_processor import TOPICS
@@ -23,17 +25,32 @@ from exploredesktop.modules.app_settings import Settings  # isort: skip
 logger = logging.getLogger("explorepy." + __name__)
 
 
+class ExGBlock(NamedTuple):
+    """Decoded filtered ExG packet shared by all the ExG consumers. Arrays are read-only"""
+    timestamp: np.ndarray
+    data: np.ndarray  # active channels x samples
+
+
+class ChannelLayout(NamedTuple):
+    """Layout of the active channels, cached until the channel settings change"""
+    indices: np.ndarray  # position of the active channels in the ExG packet
+    names: List[str]  # input names of the active channels
+    custom_names: List[str]  # names set by the user
+
+
 class ExploreInterface(Explore):
     """Interface class for Explore"""
 
     def __init__(self):
         super().__init__()
+        self._chan_layout = None
         self.device_chan = None
         self.chan_dict_list = []
         self.chan_mask = "1111"
         self.settings = None
         self.record_filename = ""
         self.filters = {}
+        self._exg_consumers = []
 
     @property
     def sampling_rate(self) -> Optional[int]:
@@ -55,6 +72,32 @@ class ExploreInterface(Explore):
         logger.debug("Device is not connected but the number of active channels method is called.")
         return None
 
+    @property
+    def chan_dict_list(self) -> list:
+        """Returns list of dictionaries with the channel settings"""
+        return self._chan_dict_list
+
+    @chan_dict_list.setter
+    def chan_dict_list(self, value: list) -> None:
+        self._chan_dict_list = value
+        self.invalidate_chan_layout()
+
+    @property
+    def chan_layout(self) -> ChannelLayout:
+        """Returns layout of the active channels"""
+        if self._chan_layout is None:
+            self._chan_layout = ChannelLayout(
+                indices=np.flatnonzero([int(i) for i in self.chan_mask]),
+                names=[one_chan_dict['input'] for one_chan_dict in self.chan_dict_list if one_chan_dict['enable']],
+                custom_names=[
+                    one_chan_dict['name'] for one_chan_dict in self.chan_dict_list if one_chan_dict['enable']]
+            )
+        return self._chan_layout
+
+    def invalidate_chan_layout(self) -> None:
+        """Discard cached channel layout. It is rebuilt on next access"""
+        self._chan_layout = None
+
     @property
     def is_recording(self) -> bool:
         """Returns recording status"""
@@ -119,6 +162,10 @@ class ExploreInterface(Explore):
         """
         self.device_chan = None
         self.chan_dict_list = []
+        # the dispatcher is subscribed again by the first consumer of the next connection
+        if self._exg_consumers and self.stream_processor is not None:
+            self.unsubscribe(callback=self._dispatch_exg, topic=TOPICS.filtered_ExG)
+        self._exg_consumers = []
         # Save current settings before disconnecting
         if self.device_name is not None:
             SettingsManager(self.device_name).save_current_session()
@@ -136,6 +183,7 @@ class ExploreInterface(Explore):
             self.settings.set_adc_mask(list(reversed(self.chan_mask)))
         else:
             logger.error("Mask must be a list, not a %s. Current mask is %s" % (type(mask), mask))
+        self.invalidate_chan_layout()
 
     # TODO change to property
     def set_chan_dict_list(self, new_dict=None):
@@ -204,8 +252,8 @@ class ExploreInterface(Explore):
             custom_name (bool, optional): whether to return custom names set by user. Defaults to False.
         """
         if custom_name:
-            return [one_chan_dict['name'] for one_chan_dict in self.chan_dict_list if one_chan_dict['enable']]
-        return [one_chan_dict['input'] for one_chan_dict in self.chan_dict_list if one_chan_dict['enable']]
+            return list(self.chan_layout.custom_names)
+        return list(self.chan_layout.names)
 
     def full_chan_list(self, custom_name) -> list:
         """Returns list of all channels
@@ -271,6 +319,51 @@ class ExploreInterface(Explore):
         """Unsubscribe a callback from a topic"""
         self.stream_processor.unsubscribe(callback, topic)
 
+    def add_exg_consumer(self, consumer: Callable) -> None:
+        """Add a consumer of decoded filtered ExG data.
+        Packets are decoded and masked once and the same ExGBlock is passed to all the consumers
+
+        Args:
+            consumer (Callable): function receiving an ExGBlock
+        """
+        if consumer in self._exg_consumers:
+            return
+        if not self._exg_consumers:
+            self.subscribe(callback=self._dispatch_exg, topic=TOPICS.filtered_ExG)
+        self._exg_consumers.append(consumer)
+
+    def remove_exg_consumer(self, consumer: Callable) -> None:
+        """Remove a consumer of decoded filtered ExG data
+
+        Args:
+            consumer (Callable): consumer to remove
+        """
+        if consumer not in self._exg_consumers:
+            return
+        self._exg_consumers.remove(consumer)
+        if not self._exg_consumers:
+            self.unsubscribe(callback=self._dispatch_exg, topic=TOPICS.filtered_ExG)
+
+    def _dispatch_exg(self, packet: explorepy.packet.EEG) -> None:
+        """Decode filtered ExG packet, remove inactive channels and pass it to the consumers
+
+        Args:
+            packet (explorepy.packet.EEG): filtered EEG packet
+        """
+        timestamp, exg = packet.get_data(self.sampling_rate)
+        chan_idx = self.chan_layout.indices
+        try:
+            exg = exg[chan_idx]
+        # IndexError might happen while the device settings are being changed
+        except IndexError:
+            exg = exg[chan_idx[chan_idx < exg.shape[0]]]
+
+        timestamp.flags.writeable = False
+        exg.flags.writeable = False
+        block = ExGBlock(timestamp, exg)
+        for consumer in self._exg_consumers:
+            consumer(block)
+
     def add_filter(self, cutoff_freq: Union[float, tuple], filter_type: str) -> None:
         """Add a filter to filtered_ExG topic
 
@@ -1,37 +1,73 @@
 """FFT visualization module"""
 import logging
+from collections import deque
 from typing import (
+    List,
     Optional,
     Tuple
 )
 
-import explorepy
 import numpy as np
+import pyqtgraph as pg
 from PySide6.QtCore import (
+    QRectF,
     QTimer,
     Slot
 )
-from scipy.ndimage.filters import gaussian_filter1d
+from PySide6.QtWidgets import (
+    QComboBox,
+    QVBoxLayout,
+    QWidget
+)
 
 
 from exploredesktop.modules.app_settings import (  # isort:skip
     DataAttributes,
+    Settings,
     Stylesheets
 )
 from exploredesktop.modules.base_data_module import (  # isort:skip
     BasePlots,
     DataContainer
 )
+from exploredesktop.modules.explore_interface import ExGBlock  # isort:skip
+from exploredesktop.modules.spectral import (  # isort:skip
+    SpectrogramEstimator,
+    WelchEstimator
+)
+from exploredesktop.modules.worker import Worker  # isort:skip
 
 
 logger = logging.getLogger("explorepy." + __name__)
 
 
 class FFTData(DataContainer):
-    """FFT data model"""
+    """FFT data model
+
+    The spectrum is computed in a worker thread of the threadpool. New blocks are handed to the worker, which adds
+    them to the Welch estimate and writes the amplitude spectrum to the back buffer. The buffers are swapped in the
+    Qt thread when the worker is done, so the plot only reads the front buffer and the worker never writes to the
+    arrays displayed by the curves. The spectrogram of the selected channel is updated by the same worker, with its
+    own double buffer.
+    """
 
     def __init__(self) -> None:
         super().__init__()
+        # channels of the spectrum. Data is only kept in the pending blocks, the ring buffer is not used
+        self.channels = []
+        # streaming Welch estimate, created when data is received. Only used by the worker while it runs
+        self.welch = None
+        # blocks not added to the estimate yet and their number of samples
+        self._pending = deque()
+        self._n_pending = 0
+        # running worker, a reference is kept so its signals are delivered after it is done
+        self._worker = None
+        # spectrogram channel name and incremental STFT, None: spectrogram disabled
+        self.spectrogram_chan = None
+        self.stft = None
+        # double buffers: [front, back]. Spectrum: (channels, frequencies, amplitude) tuples.
+        # Spectrogram: (image, levels, duration, frequencies) tuples
+        self._buffers = {"spectrum": [None, None], "spectrogram": [None, None]}
 
         self.signals.updateDataAttributes.connect(self.update_attributes)
 
@@ -42,56 +78,196 @@ class FFTData(DataContainer):
         Args:
             attributes (list): list of attributes to update
         """
-        active_chan = self.explorer.active_chan_list()
         if DataAttributes.DATA in attributes:
-            points = self.plot_points(downsampling=False)
-            self.plot_data = {ch: np.array([np.NaN] * points) for ch in active_chan}
+            self.channels = self.explorer.active_chan_list()
+            # spectra of the previous channels are not kept
+            self.reset_spectrum()
+
+    def callback(self, block: ExGBlock) -> None:
+        """Callback to obtain filtered ExG data. Runs in the explorepy thread, data is only queued
+
+        Args:
+            block (ExGBlock): decoded EEG packet with active channels only
+        """
+        self.queue.put(block)
+
+    def ingest(self, item: ExGBlock) -> None:
+        """Keep ExG data for the next spectrum update
+
+        Args:
+            item (ExGBlock): decoded EEG packet with active channels only
+        """
+        timestamp, exg = item
+        s_rate = self.explorer.sampling_rate
+        if s_rate is None or not self.check_timestamps(timestamp, s_rate):
+            return
+        self.add_pending(exg)
+
+    def insert_gap(self, t_start: float, t_end: float) -> None:
+        """Add the missing samples as NaNs
+
+        Segments joining the data around the gap are left out of the spectrum, and the spectrogram shows the gap.
+
+        Args:
+            t_start (float): timestamp of the first missing sample
+            t_end (float): timestamp of the first sample after the gap
+        """
+        s_rate = self.explorer.sampling_rate
+        # pending data doesn't hold more than Settings.PSD_MAX_PENDING seconds
+        n_gap = min(int(round((t_end - t_start) * s_rate)), int(Settings.PSD_MAX_PENDING * s_rate))
+        if n_gap > 0:
+            self.add_pending(np.full((len(self.channels), n_gap), np.nan))
+
+    def restart_clock(self, timestamp: float) -> None:
+        """Restart the spectrum and the spectrogram after a reset of the device clock
+
+        Args:
+            timestamp (float): first timestamp of the new clock
+        """
+        super().restart_clock(timestamp)
+        self.reset_spectrum()
+
+    def add_pending(self, exg: np.ndarray) -> None:
+        """Keep a block for the next spectrum update. Blocks are not modified by the consumers, so no copy is made
+
+        Only the last Settings.PSD_MAX_PENDING seconds are kept while the spectrum is not updated.
+
+        Args:
+            exg (np.ndarray): channels x samples exg data
+        """
+        s_rate = self.explorer.sampling_rate
+        # channels might be out of sync while the channel mask is being changed
+        if s_rate is None or exg.shape[0] != len(self.channels):
+            return
+        self._pending.append(exg)
+        self._n_pending += exg.shape[1]
+        while self._n_pending - self._pending[0].shape[1] >= Settings.PSD_MAX_PENDING * s_rate:
+            self._n_pending -= self._pending.popleft().shape[1]
+
+    def spectrum_worker(self) -> Optional[Worker]:
+        """Returns a worker adding the pending blocks to the spectrum
+
+        Returns:
+            Worker: worker to start, None if there is no new data or the previous worker is still running
+        """
+        s_rate = self.explorer.sampling_rate
+        if self._worker is not None or not self._pending or s_rate is None:
+            return None
+        channels = list(self.channels)
+        if self.welch is None or not self.welch.accepts(s_rate, len(channels)):
+            self.welch = WelchEstimator(s_rate, len(channels))
+        stft, chan_idx = None, None
+        if self.spectrogram_chan in channels:
+            if self.stft is None or not self.stft.accepts(s_rate):
+                self.stft = SpectrogramEstimator(s_rate)
+            stft, chan_idx = self.stft, channels.index(self.spectrogram_chan)
+        blocks = list(self._pending)
+        self._pending.clear()
+        self._n_pending = 0
+
+        self._worker = Worker(self.compute_spectrum, self.welch, stft, chan_idx, blocks, channels, self._buffers)
+        self._worker.signals.error.connect(self._worker_failed)
+        return self._worker
+
+    def _worker_failed(self, error: tuple) -> None:
+        """Allow new workers after an error in the worker thread"""
+        logger.debug("Error computing the spectrum: %s", error[1])
+        self._worker = None
 
     @staticmethod
-    def get_fft(exg: np.array, s_rate: int) -> Tuple[np.array, np.array]:
-        """Compute FFT
+    def compute_spectrum(
+        welch: WelchEstimator, stft: Optional[SpectrogramEstimator], chan_idx: Optional[int],
+        blocks: List[np.ndarray], channels: list, buffers: dict
+    ) -> Tuple[dict, list]:
+        """Add blocks to the estimates and write the results to the back buffers. Runs in the worker thread
 
         Args:
-            exg (np.array): exg data from ExG packet
-            s_rate (int): sampling rate
+            welch (WelchEstimator): Welch estimate
+            stft (SpectrogramEstimator): spectrogram estimate, None if the spectrogram is disabled
+            chan_idx (int): row of the spectrogram channel in the blocks
+            blocks (list): channels x samples blocks
+            channels (list): channel names
+            buffers (dict): double buffers
 
         Returns:
-            Tuple[np.array, np.array]: ExG data fourier transform, frequencies
+            Tuple[dict, list]: double buffers and names of the ones with a new back buffer
         """
-        n_point = 1024
-        exg -= exg.mean(axis=1)[:, np.newaxis]
-        freq = s_rate * np.arange(int(n_point / 2)) / n_point
-        fft_content = np.fft.fft(exg, n=n_point) / n_point
-        fft_content = np.abs(fft_content[:, range(int(n_point / 2))])
-        fft_content = gaussian_filter1d(fft_content, 1)
-        return fft_content[:, 1:], freq[1:]
+        for block in blocks:
+            welch.update(block)
+            if stft is not None:
+                stft.update(block[chan_idx])
+
+        updated = []
+        psd = welch.psd
+        if psd is not None:
+            back = buffers["spectrum"][1]
+            # DC is not displayed
+            shape = (psd.shape[0], psd.shape[1] - 1)
+            amplitude = back[2] if back is not None and back[2].shape == shape else np.empty(shape)
+            np.sqrt(psd[:, 1:], out=amplitude)
+            buffers["spectrum"][1] = (channels, welch.freq[1:], amplitude)
+            updated.append("spectrum")
+
+        if stft is not None:
+            back = buffers["spectrogram"][1]
+            shape = (stft.n_columns, stft.n_freq)
+            image = stft.image(out=back[0] if back is not None and back[0].shape == shape else None)
+            finite = image[np.isfinite(image)]
+            if len(finite):
+                levels = tuple(np.percentile(finite, Settings.SPECTROGRAM_LEVELS))
+                buffers["spectrogram"][1] = (image, levels, stft.duration, stft.freq)
+                updated.append("spectrogram")
+        return buffers, updated
+
+    def swap_spectrum(self, result: Tuple[dict, list]) -> list:
+        """Swap front and back buffers after a worker is done. Called from the Qt thread
+
+        Args:
+            result (Tuple[dict, list]): double buffers and names of the ones with a new back buffer
 
-    def callback(self, packet: explorepy.packet.EEG) -> None:
-        """Callback to obtain raw ExG data
+        Returns:
+            list: names of the buffers with new data in the front buffer
+        """
+        self._worker = None
+        buffers, updated = result
+        # estimates might have been reset while the worker was running
+        if buffers is not self._buffers:
+            return []
+        for name in updated:
+            buffers[name].reverse()
+        return updated
+
+    def reset_spectrum(self) -> None:
+        """Discard pending data, the spectrum and the spectrogram. A running worker finishes with the old estimates"""
+        self.welch = None
+        self.stft = None
+        self._pending.clear()
+        self._n_pending = 0
+        self._buffers = {"spectrum": [None, None], "spectrogram": [None, None]}
+
+    def set_spectrogram_chan(self, chan: Optional[str]) -> None:
+        """Set the channel of the spectrogram. The spectrogram starts again from the new data
 
         Args:
-            packet (explorepy.packet.EEG): EEG packet
+            chan (str): channel name, None to disable the spectrogram
         """
-        chan_list = self.explorer.active_chan_list()
-        exg_fs = self.explorer.sampling_rate
+        self.spectrogram_chan = chan
+        self.stft = None
+        # results of a running worker are discarded
+        self._buffers = {"spectrum": list(self._buffers["spectrum"]), "spectrogram": [None, None]}
 
-        _, exg = packet.get_data(exg_fs)
-        orig_exg = dict(zip(chan_list, exg))
-        self.insert_new_data(data=orig_exg, fft=True)
-        self.update_pointer(data=orig_exg, fft=True)
+    def spectrogram_data(self) -> Optional[tuple]:
+        """Returns spectrogram to plot: image (columns x frequencies in dB), levels, duration and frequencies"""
+        return self._buffers["spectrogram"][0]
 
     def fft_plot_data(self) -> Optional[dict]:
-        """Returns FFT data to plot
+        """Returns amplitude spectral density (square root of the Welch estimate) of each channel to plot
         """
-        exg_fs = self.explorer.sampling_rate
-        exg_data = np.array(
-            [self.plot_data[key][~np.isnan(self.plot_data[key])] for key in self.plot_data.keys()], dtype=object)
-
-        if (len(exg_data.shape) == 1) or (exg_data.shape[1] < exg_fs * 5):
+        if self._buffers["spectrum"][0] is None:
             return
 
-        fft_content, freq = self.get_fft(exg_data, exg_fs)
-        data = dict(zip(self.plot_data.keys(), fft_content))
+        channels, freq, amplitude = self._buffers["spectrum"][0]
+        data = dict(zip(channels, amplitude))
         data['f'] = freq
 
         return data
@@ -103,6 +279,33 @@ class FFTPlot(BasePlots):
         super().__init__(ui)
         self.model = FFTData()
         self.timer = QTimer()
+        self.timer.timeout.connect(self.plot)
+
+        # spectrogram of one channel, next to the spectrum. Hidden until it is enabled
+        self.spectrogram_widget = QWidget(self.ui.fft)
+        self.value_spectrogram_chan = QComboBox(self.spectrogram_widget)
+        self.plot_spectrogram = pg.PlotWidget(self.spectrogram_widget)
+        self.spectrogram_item = pg.ImageItem()
+        self._setup_spectrogram()
+
+    def _setup_spectrogram(self) -> None:
+        """Add the spectrogram widgets to the FFT tab"""
+        layout = QVBoxLayout(self.spectrogram_widget)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.value_spectrogram_chan)
+        layout.addWidget(self.plot_spectrogram)
+        self.ui.horizontalLayout_23.addWidget(self.spectrogram_widget)
+        self.spectrogram_widget.setHidden(True)
+
+        plot_wdgt = self.plot_spectrogram
+        plot_wdgt.setBackground(Stylesheets.PLOT_BACKGROUND)
+        plot_wdgt.setLabel('left', 'Frequency (Hz)')
+        plot_wdgt.setLabel('bottom', 'time (s)')
+        plot_wdgt.setMouseEnabled(x=False, y=False)
+        self.spectrogram_item.setLookupTable(pg.colormap.get("viridis").getLookupTable(nPts=256))
+        plot_wdgt.addItem(self.spectrogram_item)
+
+        self.value_spectrogram_chan.currentIndexChanged.connect(self.change_spectrogram_chan)
 
     def init_plot(self) -> None:
         """Initialize FFT plot"""
@@ -114,7 +317,7 @@ class FFTPlot(BasePlots):
         col = 2 if self.model.explorer.device_chan <= 8 else 4
         plot_wdgt.addLegend(horSpacing=20, colCount=col, brush='k', offset=(0, -300))
         plot_wdgt.showGrid(x=True, y=True, alpha=0.5)
-        plot_wdgt.setLabel('left', 'Amplitude (uV)')
+        plot_wdgt.setLabel('left', 'Amplitude (uV/\u221AHz)')
         plot_wdgt.setLabel('bottom', 'Frequency (Hz)')
         plot_wdgt.setLogMode(x=False, y=True)
         plot_wdgt.setMouseEnabled(x=False, y=False)
@@ -128,9 +331,39 @@ class FFTPlot(BasePlots):
         ]
         self.active_curves_list = self.add_active_curves(all_curves_list, plot_wdgt)
 
+        # keep the spectrogram channel if it is still active
+        current = self.value_spectrogram_chan.currentText()
+        self.value_spectrogram_chan.blockSignals(True)
+        self.value_spectrogram_chan.clear()
+        self.value_spectrogram_chan.addItems(self.model.explorer.active_chan_list(custom_name=True))
+        self.value_spectrogram_chan.setCurrentText(current)
+        self.value_spectrogram_chan.blockSignals(False)
+        self.change_spectrogram_chan()
+
     def plot(self) -> None:
-        """Plot FFT data
+        """Start a worker updating the spectrum with the new data. The result is plotted by display_spectrum
+        """
+        worker = self.model.spectrum_worker()
+        if worker is None:
+            return
+        worker.signals.result.connect(self.display_spectrum)
+        self.model.threadpool.start(worker)
+
+    @Slot(object)
+    def display_spectrum(self, result: Tuple[dict, list]) -> None:
+        """Plot the spectrum and spectrogram computed by a worker
+
+        Args:
+            result (Tuple[dict, list]): double buffers and names of the ones with a new back buffer
         """
+        updated = self.model.swap_spectrum(result)
+        if "spectrum" in updated:
+            self.update_curves()
+        if "spectrogram" in updated:
+            self.update_spectrogram()
+
+    def update_curves(self) -> None:
+        """Plot the front buffer of the spectrum"""
         plot_wdgt = self.ui.plot_fft
         # NOTE uncomment below to have FFT range = Sampling Rate / 2
         # max_x_range = round(self.model.explorer.sampling_rate / 2)
@@ -140,25 +373,89 @@ class FFTPlot(BasePlots):
         if data is None:
             return
 
-        for curve, chan in zip(self.active_curves_list, self.model.explorer.active_chan_list()):
+        for curve, chan in zip(self.active_curves_list, self.model.explorer.chan_layout.names):
             try:
                 curve.setData(data['f'], data[chan])
             except KeyError:
                 pass
 
+    def update_spectrogram(self) -> None:
+        """Plot the front buffer of the spectrogram. Newest column is at t = 0"""
+        data = self.model.spectrogram_data()
+        if data is None:
+            self.spectrogram_item.clear()
+            return
+        image, levels, duration, freq = data
+        self.spectrogram_item.setImage(image, autoLevels=False, levels=levels)
+        # each pixel is centered on its frequency
+        resolution = freq[1] - freq[0]
+        self.spectrogram_item.setRect(QRectF(-duration, freq[0] - resolution / 2, duration, len(freq) * resolution))
+
+    @Slot(bool)
+    def set_spectrogram_visible(self, visible: bool) -> None:
+        """Show or hide the spectrogram. It is only computed while it is visible
+
+        Args:
+            visible (bool): whether the spectrogram is visible
+        """
+        self.spectrogram_widget.setVisible(visible)
+        self.change_spectrogram_chan()
+        # spectrogram is updated more often than the spectrum
+        if self.timer.isActive():
+            self.stop_timer()
+            self.start_timer()
+
+    @Slot()
+    def change_spectrogram_chan(self) -> None:
+        """Compute the spectrogram of the selected channel"""
+        idx = self.value_spectrogram_chan.currentIndex()
+        active_chan = self.model.explorer.active_chan_list()
+        chan = None
+        if self.spectrogram_widget.isVisibleTo(self.ui.fft) and 0 <= idx < len(active_chan):
+            chan = active_chan[idx]
+        if chan == self.model.spectrogram_chan:
+            return
+        logger.debug("Spectrogram channel has been changed to %s", chan)
+        self.model.set_spectrogram_chan(chan)
+        self.update_spectrogram()
+
+    def refresh(self) -> None:
+        """Ingest queued data. FFT is plotted on its own timer"""
+        self.model.process_queue()
+
+    def set_visible(self, visible: bool) -> None:
+        """Start or stop the plotting timer depending on the visibility
+
+        Args:
+            visible (bool): whether the plot is visible
+        """
+        if visible and not self.visible:
+            self.update_curves()
+            self.plot()
+        super().set_visible(visible)
+        if visible:
+            self.start_timer()
+        else:
+            self.stop_timer()
+
     def reset_vars(self) -> None:
         """Reset timer"""
         if self.timer.isActive():
             self.stop_timer()
+        self.model.queue.clear()
+        self.model.reset_spectrum()
+        self.model.next_timestamp = None
 
     def start_timer(self) -> None:
         """Start plotting timer"""
         if self.timer.isActive():
             return
-        # NOTE Change value to control refresh rate (im msec)
-        refresh_rate = 2000  # msec
+        # a new segment is added to the spectrum every hop
+        if self.model.spectrogram_chan is not None:
+            refresh_rate = round(1000 * Settings.SPECTROGRAM_HOP)  # msec
+        else:
+            refresh_rate = round(1000 * Settings.PSD_SEGMENT_LENGTH * (1 - Settings.PSD_OVERLAP))  # msec
         self.timer.setInterval(refresh_rate)
-        self.timer.timeout.connect(self.plot)
         self.timer.start()
 
     def stop_timer(self) -> None:
@@ -0,0 +1,220 @@
+"""Long history of visualization data with memory-mapped spill-over"""
+import logging
+import math
+import os
+import tempfile
+from collections import deque
+from typing import (
+    List,
+    Optional,
+    Tuple
+)
+
+import numpy as np
+
+
+from exploredesktop.modules.app_settings import Settings  # isort:skip
+
+
+logger = logging.getLogger("explorepy." + __name__)
+
+
+class HistoryStore:
+    """Bounded store with the last minutes of data, kept behind the visible ring buffer
+
+    Data is appended in fixed-size chunks. The most recent chunks are kept in RAM and older ones are spilled to a
+    memory-mapped temporary file used as a ring of chunk slots, so memory use is bounded and the cost of appending
+    doesn't depend on the length of the history. Chunks older than the history length are discarded.
+
+    Rows are keyed by channel name, so the active channels can change without discarding the history: data of a
+    channel is NaN while it is not active.
+
+    Args:
+        channels (list): names of all the channels that can be stored, e.g. all the inputs of the device
+        s_rate (float): sampling rate of the data
+        length (float, optional): history length in seconds. Defaults to Settings.HISTORY_LENGTH.
+        chunk_size (int, optional): samples per chunk. Defaults to Settings.HISTORY_CHUNK_SIZE.
+        ram_chunks (int, optional): number of chunks kept in RAM. Defaults to Settings.HISTORY_RAM_CHUNKS.
+    """
+
+    def __init__(
+        self, channels: List[str], s_rate: float, length: float = Settings.HISTORY_LENGTH,
+        chunk_size: int = Settings.HISTORY_CHUNK_SIZE, ram_chunks: int = Settings.HISTORY_RAM_CHUNKS
+    ) -> None:
+        self.channels = list(channels)
+        self.s_rate = s_rate
+        # rows of each list of channels
+        self._rows = {}
+        self.length = length
+        self.chunk_size = chunk_size
+        self.ram_chunks = ram_chunks
+
+        self.n_slots = max(math.ceil(length * s_rate / chunk_size) - ram_chunks, 1)
+
+        # chunk being filled
+        self._data = np.full((self.n_chan, chunk_size), np.nan, dtype=np.float32)
+        self._t = np.full(chunk_size, np.nan)
+        self._n_samples = 0
+
+        # full chunks in RAM, oldest first: (t, data)
+        self._ram = deque()
+        # chunks in the memory-mapped file, oldest first: (t, slot)
+        self._disk = deque()
+        self._next_slot = 0
+        self._file = None
+        self._mmap = None
+
+    @property
+    def n_chan(self) -> int:
+        """Returns number of channels"""
+        return len(self.channels)
+
+    def accepts(self, channels: List[str], s_rate: float) -> bool:
+        """Whether the store can hold data with the given channels and sampling rate
+
+        Args:
+            channels (list): channel names
+            s_rate (float): sampling rate
+        """
+        return set(channels) <= set(self.channels) and s_rate == self.s_rate
+
+    def rows(self, channels: Optional[List[str]] = None) -> np.ndarray:
+        """Returns rows of the store holding some channels
+
+        Args:
+            channels (list, optional): channel names. Defaults to None (all the channels).
+        """
+        if channels is None:
+            return np.arange(self.n_chan)
+        key = tuple(channels)
+        if key not in self._rows:
+            self._rows[key] = np.array([self.channels.index(chan) for chan in channels], dtype=int)
+        return self._rows[key]
+
+    @property
+    def t_range(self) -> Optional[Tuple[float, float]]:
+        """Returns time of the oldest and newest samples in the store, None if it is empty"""
+        if self._disk:
+            t_first = self._disk[0][0][0]
+        elif self._ram:
+            t_first = self._ram[0][0][0]
+        elif self._n_samples:
+            t_first = self._t[0]
+        else:
+            return None
+        t_last = self._t[self._n_samples - 1] if self._n_samples else self._ram[-1][0][-1]
+        return t_first, t_last
+
+    def append(self, time_vector: np.ndarray, block: np.ndarray, channels: Optional[List[str]] = None) -> None:
+        """Add a block of samples
+
+        Args:
+            time_vector (np.ndarray): time vector of the block
+            block (np.ndarray): channels x samples block
+            channels (list, optional): channel of each row of the block. Defaults to None (all the channels).
+        """
+        rows = self.rows(channels)
+        n_new = len(time_vector)
+        done = 0
+        while done < n_new:
+            n_copy = min(self.chunk_size - self._n_samples, n_new - done)
+            dst = slice(self._n_samples, self._n_samples + n_copy)
+            self._data[rows, dst] = block[:, done:done + n_copy]
+            self._t[dst] = time_vector[done:done + n_copy]
+            self._n_samples += n_copy
+            done += n_copy
+            if self._n_samples == self.chunk_size:
+                self._push_chunk()
+
+    def _push_chunk(self) -> None:
+        """Move the current chunk to RAM, spilling the oldest RAM chunk to disk if needed"""
+        t_newest = self._t[-1]
+        self._ram.append((self._t, self._data))
+        self._data = np.full((self.n_chan, self.chunk_size), np.nan, dtype=np.float32)
+        self._t = np.full(self.chunk_size, np.nan)
+        self._n_samples = 0
+
+        if len(self._ram) > self.ram_chunks:
+            t_chunk, data_chunk = self._ram.popleft()
+            self._spill(t_chunk, data_chunk)
+
+        # discard chunks older than the history length
+        t_min = t_newest - self.length
+        while self._disk and self._disk[0][0][-1] < t_min:
+            self._disk.popleft()
+
+    def _spill(self, t_chunk: np.ndarray, data_chunk: np.ndarray) -> None:
+        """Write a chunk to the next slot of the memory-mapped file
+
+        Args:
+            t_chunk (np.ndarray): time vector of the chunk
+            data_chunk (np.ndarray): channels x samples chunk
+        """
+        if self._mmap is None:
+            self._open_file()
+        # the slot is reused, drop the chunk stored in it
+        if len(self._disk) == self.n_slots:
+            self._disk.popleft()
+        slot = self._next_slot
+        self._mmap[slot] = data_chunk
+        self._disk.append((t_chunk, slot))
+        self._next_slot = (slot + 1) % self.n_slots
+
+    def _open_file(self) -> None:
+        """Create the memory-mapped temporary file"""
+        fd, self._file = tempfile.mkstemp(prefix="explore_history_", suffix=".dat")
+        os.close(fd)
+        self._mmap = np.memmap(
+            self._file, dtype=np.float32, mode="w+", shape=(self.n_slots, self.n_chan, self.chunk_size))
+        logger.debug("History spill-over file created: %s", self._file)
+
+    def _chunks(self):
+        """Iterate over all the chunks with data, oldest first"""
+        for t_chunk, slot in self._disk:
+            yield t_chunk, self._mmap[slot]
+        for t_chunk, data_chunk in self._ram:
+            yield t_chunk, data_chunk
+        if self._n_samples:
+            yield self._t[:self._n_samples], self._data[:, :self._n_samples]
+
+    def get(
+        self, t_start: float, t_end: float, channels: Optional[List[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the samples in a time range
+
+        Args:
+            t_start (float): start of the range
+            t_end (float): end of the range
+            channels (list, optional): channels to get. Defaults to None (all the channels).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: time vector and channels x samples data
+        """
+        rows = self.rows(channels)
+        t_parts = []
+        data_parts = []
+        for t_chunk, data_chunk in self._chunks():
+            if t_chunk[-1] < t_start or t_chunk[0] > t_end:
+                continue
+            start, stop = np.searchsorted(t_chunk, [t_start, t_end], side="left")
+            stop = min(stop + 1, len(t_chunk))
+            t_parts.append(t_chunk[start:stop])
+            data_parts.append(np.asarray(data_chunk[rows, start:stop]))
+
+        if not t_parts:
+            return np.empty(0), np.empty((len(rows), 0), dtype=np.float32)
+        return np.concatenate(t_parts), np.concatenate(data_parts, axis=1)
+
+    def close(self) -> None:
+        """Discard all the data and delete the temporary file"""
+        self._ram.clear()
+        self._disk.clear()
+        self._n_samples = 0
+        # release the memory map before removing the file
+        self._mmap = None
+        if self._file is not None:
+            try:
+                os.remove(self._file)
+            except OSError as error:
+                logger.debug("Could not remove history file: %s", str(error))
+            self._file = None
@@ -15,9 +15,11 @@ logger = logging.getLogger("explorepy." + __name__)
 
 
 class IntegrationFrameView(BaseModel):
-    def __init__(self, ui) -> None:
+    def __init__(self, ui, band_power) -> None:
         super().__init__()
         self.ui = ui
+        # band power model, streamed along with the device data
+        self.band_power = band_power
         self.timer = QTimer()
 
     def setup_ui_connections(self) -> None:
@@ -43,12 +45,14 @@ class IntegrationFrameView(BaseModel):
         """
         duration = 3600 * 8 if duration is None else duration
         self.explorer.push2lsl(duration, block=False)
+        self.band_power.start_lsl()
         self.ui.btn_lsl.setIcon(QIcon(u":icons/icons/cil-media-pause.png"))
         self.start_timer(duration)
 
     def stop_lsl_push(self) -> None:
         """Stop pushing to lsl"""
         self.explorer.stop_lsl()
+        self.band_power.stop_lsl()
         self.ui.btn_lsl.setIcon(QIcon(u":icons/icons/cil-media-play.png"))
 
     def start_timer(self, duration: int) -> None:
@@ -40,17 +40,25 @@ class MarkerData(DataContainer):
         self.acquire_external_markers = True
 
     def callback(self, packet: explorepy.packet.EventMarker) -> None:
-        """Get marker data from packet and emit signal
+        """Get marker data from packet and queue it to be plotted in the next frame
 
         Args:
             packet (explorepy.packet.EventMarker): Event marker packet
         """
-        timestamp, code = packet.get_data()
+        self.queue.put(packet.get_data())
+
+    def ingest(self, item: tuple) -> None:
+        """Add marker to the plot
+
+        Args:
+            item (tuple): timestamp and code of the marker
+        """
+        timestamp, code = item
         if DataContainer.vis_time_offset is None:
             DataContainer.vis_time_offset = timestamp[0]
         time_vector = list(np.asarray(timestamp) - DataContainer.vis_time_offset)
         data = [time_vector[0], str(code[0]), False]
-        self.signals.mkrAdd.emit(data)
+        self.add_mkr(data)
 
     @Slot(list)
     def add_mkr(self, data: list) -> None:
@@ -250,6 +258,16 @@ class MarkerPlot(BasePlots):
         to_remove = super().remove_old_item(item_dict, last_t, item_type)
         self.model.mrk_replot, to_remove = self.model.remove_dict_item(item_dict, item_type, to_remove)
 
+    @Slot()
+    def clear_markers(self) -> None:
+        """Remove all the markers from the plot, e.g. after a reset of the device clock"""
+        for mrk_dict in (self.model.mrk_plot, self.model.mrk_replot):
+            for lines in mrk_dict['lines']:
+                for line in lines:
+                    self._remove_lines(line)
+        self.model.mrk_plot = {'t': [], 'code': [], 'lines': []}
+        self.model.mrk_replot = {'t': [], 'code': [], 'lines': []}
+
     def init_plot(self):
         raise NotImplementedError
 
@@ -15,6 +15,8 @@ from PySide6.QtCore import Slot
 from exploredesktop.modules.app_settings import (  # isort:skip
     DataAttributes,
     GUISettings,
+    PlotModes,
+    Settings,
     Stylesheets
 )
 from exploredesktop.modules.base_data_module import BasePlots, DataContainer   # isort:skip
@@ -28,19 +30,18 @@ ORN_LIST = ['accX', 'accY', 'accZ', 'gyroX', 'gyroY', 'gyroZ', 'magX', 'magY', '
 
 class ORNData(DataContainer):
     """Orientation data model"""
+    connection_gap = 1
 
     def __init__(self) -> None:
         super().__init__()
-        self.plot_data = {k: np.array([np.NaN] * 200) for k in ORN_LIST}
-        self.t_plot_data = np.array([np.NaN] * 200)
+        self.resize_buffer(ORN_LIST, 200)
 
         self.signals.updateDataAttributes.connect(self.update_attributes)
 
     def reset_vars(self):
         """Reset class variables"""
         super().reset_vars()
-        self.plot_data = {k: np.array([np.NaN] * 200) for k in ORN_LIST}
-        self.t_plot_data = np.array([np.NaN] * 200)
+        self.resize_buffer(ORN_LIST, 200)
         self.pointer = 0
 
     def new_t_axis(self, signal: Optional[PySide6.QtCore.Signal] = None) -> None:
@@ -52,15 +53,15 @@ class ORNData(DataContainer):
         signal = self.signals.tAxisORNChanged
         return super().new_t_axis(signal)
 
-    def update_pointer(self, data: dict, signal: Optional[PySide6.QtCore.Signal] = None, fft=False) -> None:
+    def update_pointer(self, n_new_points: int, signal: Optional[PySide6.QtCore.Signal] = None, fft=False) -> None:
         """Update pointer
 
         Args:
-            data (dict): ORN data dictionary
+            n_new_points (int): number of new ORN samples
             signal (Optional[PySide6.QtCore.Signal]): Signal to emit. Defaults to None.
         """
         signal = self.signals.tRangeORNChanged
-        return super().update_pointer(data, signal)
+        return super().update_pointer(n_new_points, signal)
 
     def update_attributes(self, attributes: list) -> None:
         """Update class attributes
@@ -72,37 +73,48 @@ class ORNData(DataContainer):
             self.pointer = 0
         if DataAttributes.ORNDATA in attributes:
             points = self.plot_points(orn=True)
-            self.t_plot_data = np.array([np.NaN] * points)
-            self.plot_data = {k: np.array([np.NaN] * points) for k in ORN_LIST}
+            self.resize_buffer(ORN_LIST, points)
 
     def callback(self, packet: explorepy.packet.Orientation) -> None:
-        """ORN callback"""
-        timestamp, orn_data = packet.get_data()
+        """ORN callback. Runs in the explorepy thread, data is only queued"""
+        self.queue.put(packet.get_data())
+
+    def ingest(self, item: tuple) -> None:
+        """Add ORN data to the buffer
+
+        Args:
+            item (tuple): timestamp and orientation data of one packet
+        """
+        timestamp, orn_data = item
+        timestamp = np.asarray(timestamp)
         if DataContainer.vis_time_offset is None:
             DataContainer.vis_time_offset = timestamp[0]
-        time_vector = list(np.asarray(timestamp) - DataContainer.vis_time_offset)
+        if not self.check_timestamps(timestamp, Settings.ORN_SRATE):
+            return
+        time_vector = timestamp - DataContainer.vis_time_offset
 
-        data = dict(zip(ORN_LIST, np.array(orn_data)[:, np.newaxis]))
-        data['t'] = time_vector
+        # one column per packet, rows ordered as ORN_LIST
+        orn_block = np.asarray(orn_data, dtype=float)[:, np.newaxis]
 
-        self.insert_new_data(data)
-        self.update_pointer(data)
-        self.new_t_axis()
+        self.insert_new_data(orn_block, time_vector)
+        self.update_pointer(len(time_vector))
 
-        self.emit_orn_data()
+        # plot is updated by the render scheduler
+        self.dirty = True
 
-    def emit_orn_data(self) -> None:
-        """Emit orientation data"""
-        try:
-            self.signals.ornChanged.emit([self.t_plot_data, self.plot_data])
-        # RuntimeError might happen when the app closes
-        except RuntimeError as error:
-            logger.debug("RuntimeError: %s", str(error))
+    def restart_clock(self, timestamp: float) -> None:
+        """Discard the plotted data after a reset of the device clock and restart the time vector from a timestamp
+
+        Args:
+            timestamp (float): first timestamp of the new clock
+        """
+        super().restart_clock(timestamp)
+        self.signals.tRangeORNChanged.emit(timestamp - DataContainer.vis_time_offset)
 
     def change_timescale(self) -> None:
         """Change plot time scale"""
-        self.signals.tRangeORNChanged.emit(DataContainer.last_t)
-        self.signals.updateDataAttributes.emit([DataAttributes.ORNPOINTER, DataAttributes.ORNDATA])
+        self.signals.updateDataAttributes.emit([DataAttributes.ORNDATA])
+        self.signals.tRangeORNChanged.emit(self.window_start())
 
 
 class ORNPlot(BasePlots):
@@ -171,6 +183,7 @@ class ORNPlot(BasePlots):
         self._add_acc_curves()
         self._add_gyro_curves()
         self._add_mag_curves()
+        self._add_seam_curves()
 
     def _link_subplots(self) -> None:
         """Link subplots to the bottom one. Only display bottom x axis
@@ -220,6 +233,14 @@ class ORNPlot(BasePlots):
         self.plot_acc.addItem(self.curve_ay)
         self.plot_acc.addItem(self.curve_az)
 
+    def _add_seam_curves(self) -> None:
+        """Add the curves joining the last sample of the buffer to the first one in moving mode"""
+        self.seam_curves = {}
+        for idx, key in enumerate(ORN_LIST):
+            curve = pg.PlotCurveItem(pen=Stylesheets.ORN_LINE_COLORS[idx % 3])
+            self.plots_list[idx // 3].addItem(curve)
+            self.seam_curves[key] = curve
+
     @Slot(dict)
     def swipe_plot(self, data: Tuple[np.array, dict]) -> None:
         """plot orientation data
@@ -237,10 +258,26 @@ class ORNPlot(BasePlots):
         # position line
         self._add_pos_line(t_vector)
 
-        # connection vector
-        connection = self._connection_vector(len(t_vector), n_nans=2)
+        # connection vector is maintained by the buffer
+        connection = self.model.buffer.connect
 
         self.set_curve_data(t_vector, plot_data, connection)
+        self.set_seam_data(t_vector, plot_data, connection)
+
+    def set_seam_data(self, t_vector: np.array, plot_data: dict, connection: np.array) -> None:
+        """Join the last sample of the buffer to the first one, which follows it in moving mode
+
+        Args:
+            t_vector (np.array): time vector
+            plot_data (dict): data to plot
+            connection (np.array): connection vector
+        """
+        joined = self.model.plot_mode == PlotModes.MOVING and len(t_vector) > 0 and connection[-1]
+        for key, curve in self.seam_curves.items():
+            if joined:
+                curve.setData(t_vector[[-1, 0]], plot_data[key][[-1, 0]])
+            elif curve.xData is not None and len(curve.xData):
+                curve.setData([], [])
 
     def set_curve_data(self, t_vector: np.array, plot_data: dict, connection: np.array) -> None:
         """Set orientation data to plot curves
@@ -0,0 +1,96 @@
+"""Packet queue used to hand off data from the explorepy thread to the Qt thread"""
+import logging
+import time
+from typing import (
+    Any,
+    List
+)
+
+
+from exploredesktop.modules.app_settings import (  # isort:skip
+    QueuePolicy,
+    Settings
+)
+
+
+logger = logging.getLogger("explorepy." + __name__)
+
+
+class PacketQueue:
+    """Bounded single-producer/single-consumer queue with preallocated slots
+
+    The producer (explorepy callback thread) only writes slots and the write counter, the consumer (Qt thread) only
+    reads slots and the read counter, so no lock is needed. With the DROP_OLDEST policy the producer never waits:
+    if the consumer falls behind, the oldest packets are overwritten and counted as dropped when the consumer
+    catches up. With the BLOCK policy the producer waits for a free slot up to Settings.QUEUE_BLOCK_TIMEOUT
+    seconds before overwriting.
+
+    Args:
+        size (int, optional): number of slots. Defaults to Settings.PACKET_QUEUE_SIZE.
+        policy (QueuePolicy, optional): overflow policy. Defaults to QueuePolicy.DROP_OLDEST.
+    """
+
+    def __init__(self, size: int = Settings.PACKET_QUEUE_SIZE, policy: QueuePolicy = QueuePolicy.DROP_OLDEST) -> None:
+        self.size = size
+        self.policy = policy
+        self._slots = [None] * size
+
+        # monotonic counters, each one is only modified by one side of the queue
+        self._write_count = 0
+        self._read_count = 0
+
+        # overflow counters
+        self.dropped = 0
+        self.blocked = 0
+
+    def __len__(self) -> int:
+        return min(self._write_count - self._read_count, self.size)
+
+    def put(self, item: Any) -> None:
+        """Add an item to the queue. Called from the producer thread
+
+        Args:
+            item (Any): item to add
+        """
+        if self.policy == QueuePolicy.BLOCK and self._write_count - self._read_count >= self.size:
+            self.blocked += 1
+            deadline = time.monotonic() + Settings.QUEUE_BLOCK_TIMEOUT
+            while self._write_count - self._read_count >= self.size and time.monotonic() < deadline:
+                time.sleep(.001)
+
+        self._slots[self._write_count % self.size] = item
+        # the counter is increased once the slot is written so the consumer never reads an empty slot
+        self._write_count += 1
+
+    def get_all(self) -> List[Any]:
+        """Remove and return all the items in the queue. Called from the consumer thread
+
+        Returns:
+            list: items in the order they were added
+        """
+        write_count = self._write_count
+        read_count = self._read_count
+
+        # producer has lapped the consumer, the oldest items are already overwritten
+        if write_count - read_count > self.size:
+            read_count = write_count - self.size
+
+        items = [self._slots[idx % self.size] for idx in range(read_count, write_count)]
+
+        # slots might have been overwritten by the producer while they were being read, discard them
+        first_valid = self._write_count - self.size
+        if first_valid > read_count:
+            items = items[first_valid - read_count:]
+            read_count = first_valid
+
+        n_dropped = read_count - self._read_count
+        if n_dropped > 0:
+            self.dropped += n_dropped
+            logger.warning("Packet queue overflow: %i packets dropped (%i in total)", n_dropped, self.dropped)
+
+        self._read_count = max(write_count, read_count)
+        return items
+
+    def clear(self) -> None:
+        """Discard all the items in the queue. Called from the consumer thread"""
+        self._read_count = self._write_count
@@ -0,0 +1,496 @@
+"""Render scheduling, visibility handling and incremental rendering for the plots"""
+import logging
+import math
+from typing import Optional
+
+import numpy as np
+import pyqtgraph as pg
+from PySide6.QtCore import (
+    QRectF,
+    QTimer
+)
+from PySide6.QtGui import (
+    QPen,
+    QTransform
+)
+
+
+from exploredesktop.modules.app_settings import Settings  # isort:skip
+from exploredesktop.modules.decimation import minmax_lod  # isort:skip
+
+
+logger = logging.getLogger("explorepy." + __name__)
+
+
+class RenderScheduler:
+    """Display refresh timer shared by all the plots
+
+    Packet callbacks only ingest data and mark their model as dirty. On every tick of the timer, each registered
+    plot pushes the data accumulated since the previous frame to its widgets, so the number of repaints per second
+    is fixed by the refresh rate instead of by the packet rate.
+
+    Args:
+        refresh_rate (int, optional): display refresh rate in Hz. Defaults to Settings.DISPLAY_REFRESH_RATE.
+    """
+
+    def __init__(self, refresh_rate: int = Settings.DISPLAY_REFRESH_RATE) -> None:
+        self.plots = []
+        self.refresh_rate = refresh_rate
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.render)
+        self.set_refresh_rate(refresh_rate)
+
+    def register(self, plot) -> None:
+        """Add a plot to the scheduler
+
+        Args:
+            plot (BasePlots): plot view implementing the refresh method
+        """
+        if plot not in self.plots:
+            self.plots.append(plot)
+
+    def set_refresh_rate(self, refresh_rate: int) -> None:
+        """Set display refresh rate
+
+        Args:
+            refresh_rate (int): refresh rate in Hz
+        """
+        if refresh_rate not in Settings.REFRESH_RATES:
+            logger.warning(
+                "Refresh rate %s Hz not supported, using %s Hz", refresh_rate, Settings.DISPLAY_REFRESH_RATE)
+            refresh_rate = Settings.DISPLAY_REFRESH_RATE
+        self.refresh_rate = refresh_rate
+        self.timer.setInterval(round(1000 / refresh_rate))
+        logger.debug("Display refresh rate set to %s Hz", refresh_rate)
+
+    def start(self) -> None:
+        """Start refresh timer"""
+        if self.timer.isActive():
+            return
+        self.timer.start()
+
+    def stop(self) -> None:
+        """Stop refresh timer"""
+        if not self.timer.isActive():
+            return
+        self.timer.stop()
+
+    def render(self) -> None:
+        """Refresh all registered plots"""
+        for plot in self.plots:
+            try:
+                plot.refresh()
+            # RuntimeError might happen when the app closes
+            except RuntimeError as error:
+                logger.debug("RuntimeError: %s", str(error))
+
+
+class VisibilityManager:
+    """Suspend rendering of the plots that are not visible
+
+    Plots keep ingesting data in the background, but their refresh is skipped while their tab is not the current
+    one, the plots page is not displayed or the window is minimized. Data received meanwhile is plotted in one go
+    once the plot becomes visible again.
+
+    Args:
+        tab_widget (QTabWidget): tab widget containing the plots
+    """
+
+    def __init__(self, tab_widget) -> None:
+        self.tab_widget = tab_widget
+        self.tabs = []
+        self.window_visible = True
+
+    def register(self, plot, tab) -> None:
+        """Add a plot to the manager
+
+        Args:
+            plot (BasePlots): plot view implementing the set_visible method
+            tab (QWidget): tab page containing the plot
+        """
+        self.tabs.append((plot, tab))
+
+    def set_window_visible(self, visible: bool) -> None:
+        """Set whether the plots page is displayed and the window not minimized
+
+        Args:
+            visible (bool): whether the plots can be seen
+        """
+        self.window_visible = visible
+        self.update()
+
+    def update(self) -> None:
+        """Update the visibility of all the registered plots"""
+        current_tab = self.tab_widget.currentWidget()
+        for plot, tab in self.tabs:
+            plot.set_visible(self.window_visible and tab is current_tab)
+
+
+def channel_transform(gain: float, offset: float) -> QTransform:
+    """Item transform displaying y as offset + gain * y
+
+    Args:
+        gain (float): y gain
+        offset (float): y offset
+
+    Returns:
+        QTransform: transform to set in the plot item
+    """
+    return QTransform(1, 0, 0, gain, 0, offset)
+
+
+class MultiCurveItem(pg.GraphicsObject):
+    """Single scene item drawing several channels
+
+    All the channels sharing the same pen are concatenated in one path, with a connection vector that breaks
+    between channels, so the cost of bounds, path building and painting doesn't grow with the number of items.
+
+    Args:
+        pens (list, optional): pen of each channel. Defaults to None (default pen for all channels).
+    """
+
+    def __init__(self, pens: Optional[list] = None) -> None:
+        super().__init__()
+        self.pens = pens if pens is not None else []
+        # (pen, path) pairs
+        self._paths = []
+        self._bounds = QRectF()
+
+    def _chan_pen(self, chan: int) -> QPen:
+        """Pen of a channel"""
+        if not self.pens:
+            return pg.mkPen()
+        return self.pens[min(chan, len(self.pens) - 1)]
+
+    def setData(
+        self, t_vector: np.ndarray, data: np.ndarray, connect: np.ndarray, channels: Optional[np.ndarray] = None
+    ) -> None:
+        """Set data of all the channels
+
+        Args:
+            t_vector (np.ndarray): time vector shared by all the channels
+            data (np.ndarray): channels x samples array, already offset
+            connect (np.ndarray): connection vector shared by all the channels
+            channels (np.ndarray, optional): channel of each row of data, used to select the pens.
+                Defaults to None (one row per channel).
+        """
+        n_rows, length = data.shape
+        if channels is None:
+            channels = range(n_rows)
+        groups = {}
+        for row, chan in enumerate(channels):
+            pen = self._chan_pen(chan)
+            groups.setdefault((pen.color().rgba(), pen.widthF()), (pen, []))[1].append(row)
+
+        paths = []
+        bounds = QRectF()
+        for pen, rows in groups.values():
+            x_vector = np.tile(t_vector, len(rows))
+            y_vector = data[rows].ravel()
+            conn_vector = np.tile(connect, len(rows))
+            # last sample of each channel is not connected to the next channel
+            conn_vector[length - 1::length] = 0
+            path = pg.arrayToQPath(x_vector, y_vector, connect=conn_vector)
+            paths.append((pen, path))
+            bounds = bounds.united(path.boundingRect())
+
+        self.prepareGeometryChange()
+        self._paths = paths
+        self._bounds = bounds
+        self.update()
+
+    def boundingRect(self) -> QRectF:
+        return self._bounds
+
+    def paint(self, painter, *args) -> None:
+        for pen, path in self._paths:
+            painter.setPen(pen)
+            painter.drawPath(path)
+
+
+class SweepRenderer:
+    """Incremental renderer for sweep plots
+
+    Each channel is split in fixed-size segments, each one drawn by its own curve item. pyqtgraph caches the path
+    of every curve item, so only the segments touched by the new samples since the previous frame, i.e. the ones
+    behind the position line, are rebuilt. Consecutive segments share one sample so the trace stays connected.
+    Everything is redrawn when the buffer is reallocated, when the time vector is shifted on wrap or when the level
+    of detail changes.
+
+    With batched rendering, all the channels of a segment are drawn by a single MultiCurveItem instead of one curve
+    item per channel.
+
+    Data is plotted as offset + gain * data for each channel (see set_scale). Curve items get the gain as an item
+    transform, so changing the scale doesn't rebuild any path. Batched items apply it when the paths are built.
+
+    In moving mode the time vector is not shifted on wrap, so only the touched segments are rebuilt, also across the
+    end of the buffer, and the last segment is connected to the first one (consecutive samples of the ring).
+
+    Only the channels of the channel mask (e.g. the ones in the viewport) are fed with data. Segments of the other
+    channels are marked as stale and rebuilt from the buffer when the channel is shown again.
+
+    Args:
+        plot_widget (pg.PlotWidget): plot widget where the curves are added
+        pen: pen of the curves, or list with the pen of each channel
+        segment_size (int, optional): samples per segment. Defaults to Settings.SWEEP_SEGMENT_SIZE.
+        batched (bool, optional): whether to draw all channels with one item. Defaults to Settings.BATCHED_RENDERING.
+    """
+
+    def __init__(
+        self, plot_widget: pg.PlotWidget, pen, segment_size: int = Settings.SWEEP_SEGMENT_SIZE,
+        batched: bool = Settings.BATCHED_RENDERING
+    ) -> None:
+        self.plot_widget = plot_widget
+        self.segment_size = segment_size
+        self.batched = batched
+        self.visible = True
+        self.moving = False
+        # channels fed with data, None: all the channels
+        self._chan_mask = None
+        # stale[segment, channel]: whether the curve doesn't show the current buffer data
+        self._stale = None
+        # gain and offset of each channel, None: data is plotted as is
+        self._gain = None
+        self._offsets = None
+
+        # items[segment]: list with one curve per channel, or MultiCurveItem if batched
+        self.items = []
+        self._layout = None
+        self._data = None
+        self._last_pointer = 0
+        self._last_written = 0
+        self._redraw_all = True
+
+        self.pens = []
+        self.set_pen(pen)
+
+    def set_pen(self, pen) -> None:
+        """Set pen of the curves
+
+        Args:
+            pen: pen of the curves, or list with the pen of each channel
+        """
+        pens = pen if isinstance(pen, (list, tuple)) else [pen]
+        self.pens = [pg.mkPen(one_pen) for one_pen in pens]
+        self.reset()
+
+    def set_batched(self, batched: bool) -> None:
+        """Set whether all the channels are drawn with one item
+
+        Args:
+            batched (bool): whether to use batched rendering
+        """
+        if batched == self.batched:
+            return
+        logger.debug("Batched rendering set to %s", batched)
+        self.batched = batched
+        self.reset()
+
+    def set_scale(self, gain: np.ndarray, offsets: np.ndarray) -> bool:
+        """Set gain and offset of each channel
+
+        Args:
+            gain (np.ndarray): gain of each channel
+            offsets (np.ndarray): offset of each channel
+
+        Returns:
+            bool: whether gain or offsets have changed
+        """
+        gain = np.ravel(gain).astype(float)
+        offsets = np.ravel(offsets).astype(float)
+        if self._gain is not None and np.array_equal(gain, self._gain) and np.array_equal(offsets, self._offsets):
+            return False
+        self._gain = gain
+        self._offsets = offsets
+        if self.batched:
+            self.invalidate()
+        else:
+            self._set_transforms()
+        return True
+
+    def _chan_transform(self, chan: int) -> QTransform:
+        """Transform of a channel"""
+        if self._gain is None or chan >= len(self._gain):
+            return QTransform()
+        return channel_transform(self._gain[chan], self._offsets[chan])
+
+    def _set_transforms(self) -> None:
+        """Set the transform of every curve item"""
+        for item in self.items:
+            if isinstance(item, list):
+                for chan, curve in enumerate(item):
+                    curve.setTransform(self._chan_transform(chan))
+
+    def set_moving(self, moving: bool) -> None:
+        """Set whether the plot is in moving mode
+
+        Args:
+            moving (bool): whether the time vector is kept on wrap
+        """
+        self.moving = moving
+        self.invalidate()
+
+    def set_channel_mask(self, mask: Optional[np.ndarray]) -> None:
+        """Set the channels fed with data. Stale segments of the channels added to the mask are rebuilt on next render
+
+        Args:
+            mask (np.ndarray): boolean mask with the channels to render, None to render all the channels
+        """
+        self._chan_mask = None if mask is None else np.asarray(mask, dtype=bool)
+
+    def set_visible(self, visible: bool) -> None:
+        """Show or hide all the curves
+
+        Args:
+            visible (bool): whether the curves are visible
+        """
+        self.visible = visible
+        for item in self.items:
+            for curve in (item if isinstance(item, list) else [item]):
+                curve.setVisible(visible)
+
+    def reset(self) -> None:
+        """Remove all the curves from the plot. They are created again on next render"""
+        for item in self.items:
+            for curve in (item if isinstance(item, list) else [item]):
+                self.plot_widget.removeItem(curve)
+        self.items = []
+        self._layout = None
+        self._data = None
+        self._stale = None
+        self._redraw_all = True
+
+    def invalidate(self) -> None:
+        """Redraw all the segments on next render"""
+        self._redraw_all = True
+
+    def _chan_pen(self, chan: int) -> QPen:
+        """Pen of a channel"""
+        return self.pens[min(chan, len(self.pens) - 1)]
+
+    def _build(self, n_chan: int, n_segments: int) -> None:
+        """Create the curve items
+
+        Args:
+            n_chan (int): number of channels
+            n_segments (int): number of segments per channel
+        """
+        self.reset()
+        for _ in range(n_segments):
+            if self.batched:
+                item = MultiCurveItem([self._chan_pen(chan) for chan in range(n_chan)])
+                self.plot_widget.addItem(item)
+            else:
+                item = [pg.PlotCurveItem(pen=self._chan_pen(chan)) for chan in range(n_chan)]
+                for curve in item:
+                    self.plot_widget.addItem(curve)
+            self.items.append(item)
+        self._stale = np.ones((n_segments, n_chan), dtype=bool)
+        self._set_transforms()
+        self.set_visible(self.visible)
+
+    def _dirty_segments(
+        self, pointer: int, n_written: int, length: int, gap: int, seg_size: int, n_segments: int
+    ) -> list:
+        """Segments touched since the previous render
+
+        The number of samples written since the previous render is taken from the write count, the pointer alone
+        can't tell whether it has wrapped once or several times (e.g. after the plot has been hidden).
+
+        Args:
+            pointer (int): current write position
+            n_written (int): samples written to the buffer since it was created
+            length (int): samples in the buffer
+            gap (int): half size of the gap around the position line
+            seg_size (int): samples per segment
+            n_segments (int): number of segments per channel
+
+        Returns:
+            list: indices of the segments to redraw
+        """
+        n_new = n_written - self._last_written
+        if self._redraw_all or n_new < 0 or n_new >= length:
+            return list(range(n_segments))
+        # the pointer is also moved back without writes, e.g. when the buffer is reset
+        wrapped = pointer < self._last_pointer or self._last_pointer + n_new >= length
+        if wrapped and not self.moving:
+            return list(range(n_segments))
+        # the previous segment ends with the first sample of the next one
+        first = max(self._last_pointer - gap - 1, 0) // seg_size
+        last = min((pointer + gap) // seg_size, n_segments - 1)
+        if wrapped:
+            segments = set(range(first, n_segments)) | set(range(last + 1))
+        else:
+            segments = set(range(first, last + 1))
+        if self.moving and 0 in (pointer, self._last_pointer):
+            # the link from the end of the buffer to the head has changed
+            segments.add(n_segments - 1)
+        return sorted(segments)
+
+    def render(
+        self, t_vector: np.ndarray, data: np.ndarray, connection: np.ndarray, pointer: int, n_written: int,
+        gap: int = 0, lod_bucket: int = 1
+    ) -> None:
+        """Update the curves with the new data
+
+        Args:
+            t_vector (np.ndarray): time vector of the plot window
+            data (np.ndarray): channels x samples plot window
+            connection (np.ndarray): connection vector of the plot window
+            pointer (int): current write position
+            n_written (int): samples written to the buffer since it was created, see RingBuffer.n_written
+            gap (int, optional): half size of the gap around the position line. Defaults to 0.
+            lod_bucket (int, optional): samples per pixel column, see decimation.minmax_lod. Defaults to 1.
+        """
+        n_chan, length = data.shape
+        # gains and buffer might be out of sync while the channels are being changed
+        if length == 0 or (self._gain is not None and len(self._gain) != n_chan):
+            return
+
+        # segments must contain full level of detail buckets
+        seg_size = math.ceil(self.segment_size / lod_bucket) * lod_bucket
+        n_segments = math.ceil(length / seg_size)
+        layout = (n_chan, length, seg_size, lod_bucket)
+        if layout != self._layout:
+            self._build(n_chan, n_segments)
+            self._layout = layout
+        if data is not self._data:
+            self._data = data
+            self._redraw_all = True
+
+        chan_mask = self._chan_mask
+        if chan_mask is None or len(chan_mask) != n_chan:
+            chan_mask = np.ones(n_chan, dtype=bool)
+        self._stale[self._dirty_segments(pointer, n_written, length, gap, seg_size, n_segments)] = True
+
+        # new data of the channels out of the mask stays stale until they are shown
+        for seg in np.flatnonzero((self._stale & chan_mask).any(axis=1)):
+            # batched items draw all the channels of the mask at once
+            chans = np.flatnonzero(chan_mask if self.batched else self._stale[seg] & chan_mask)
+            start = seg * seg_size
+            stop = min(start + seg_size + 1, length)
+            if self.moving and stop == length:
+                # last sample of the buffer is followed by the first one
+                idx = np.r_[start:stop, 0]
+                data_seg = data[np.ix_(chans, idx)]
+            else:
+                idx = slice(start, stop)
+                # only the rows of the segment are copied
+                data_seg = data[:, idx][chans]
+            t_seg, conn_seg = t_vector[idx], connection[idx]
+            t_seg, data_seg, conn_seg = minmax_lod(t_seg, data_seg, conn_seg, lod_bucket)
+            if self.batched:
+                if self._gain is not None:
+                    data_seg = self._offsets[chans, np.newaxis] + self._gain[chans, np.newaxis] * data_seg
+                self.items[seg].setData(t_seg, data_seg, conn_seg, channels=chans)
+                # channels out of the mask are not drawn by the item anymore
+                self._stale[seg] = ~chan_mask
+            else:
+                for chan, chan_data in zip(chans, data_seg):
+                    self.items[seg][chan].setData(t_seg, chan_data, connect=conn_seg)
+                self._stale[seg, chans] = False
+
+        self._last_pointer = pointer
+        self._last_written = n_written
+        self._redraw_all = False
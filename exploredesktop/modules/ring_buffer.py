@@ -0,0 +1,201 @@
+"""Ring buffer used as storage engine for the visualization data models"""
+import logging
+from typing import (
+    List,
+    Optional
+)
+
+import numpy as np
+
+
+logger = logging.getLogger("explorepy." + __name__)
+
+
+class RingBuffer:
+    """Preallocated channels x samples ring buffer with a single write head
+
+    Data is stored in one contiguous float32 block, one row per channel, together with a float64 time vector.
+    New packets are written with one vectorized operation at the write head. Each channel row is exposed as a
+    view, so the plot layer can access the data by channel name without copies.
+
+    A connection vector for the plot curves is maintained with the data: samples with missing data (NaNs) and
+    the samples around the write head (gap between old and new data) are not connected. It is only updated for
+    the new samples and around the head, so it can be used directly by the renderers on every frame.
+
+    Args:
+        channels (list): channel names, one per row of the buffer
+        n_samples (int): number of samples per channel
+        dtype (np.dtype, optional): data type of the buffer. Defaults to np.float32.
+        gap (int, optional): number of samples disconnected at each side of the write head. Defaults to 0.
+    """
+
+    def __init__(
+        self, channels: Optional[List[str]] = None, n_samples: int = 0, dtype=np.float32, gap: int = 0
+    ) -> None:
+        self.dtype = dtype
+        self.gap = gap
+        self.head = 0
+        # samples the head has been advanced since the buffer was created, never decreases
+        self.n_written = 0
+
+        self.channels = []
+        self.data = np.empty((0, 0), dtype=self.dtype)
+        self.t = np.empty(0)
+        self.views = {}
+        # whether all channels have data for each sample
+        self.valid = np.empty(0, dtype=bool)
+        # connection vector (1: connect sample to the next one)
+        self.connect = np.empty(0, dtype=np.int32)
+        self._gap_index = np.empty(0, dtype=int)
+
+        self.resize(channels if channels is not None else [], n_samples)
+
+    def __len__(self) -> int:
+        return self.data.shape[1]
+
+    @property
+    def n_chan(self) -> int:
+        """Returns number of channels in the buffer"""
+        return self.data.shape[0]
+
+    def resize(self, channels: List[str], n_samples: int) -> None:
+        """Reallocate the buffer and fill it with NaNs
+
+        Args:
+            channels (list): channel names
+            n_samples (int): number of samples per channel
+        """
+        self.channels = list(channels)
+        self.data = np.full((len(self.channels), n_samples), np.nan, dtype=self.dtype)
+        self.t = np.full(n_samples, np.nan)
+        # rows of a C-contiguous array are views, they stay valid until the next resize
+        self.views = {ch: self.data[idx] for idx, ch in enumerate(self.channels)}
+        self.valid = np.zeros(n_samples, dtype=bool)
+        self.connect = np.zeros(n_samples, dtype=np.int32)
+        self._gap_index = np.empty(0, dtype=int)
+
+        # keep the head inside the new buffer
+        self.seek(self.head % n_samples if n_samples > 0 else 0)
+
+    def rewindow(self, channels: List[str], n_samples: int, t_shift: float = 0.) -> int:
+        """Reallocate the buffer keeping the most recent samples
+
+        Samples with a valid time are copied from the oldest to the newest one at the beginning of the new buffer and
+        the head is placed after them. Rows are matched by channel name, new channels are filled with NaNs. The
+        samples kept are connected as before, the NaNs of a new channel don't disconnect the other channels.
+
+        Args:
+            channels (list): channel names
+            n_samples (int): number of samples per channel
+            t_shift (float, optional): value subtracted from the time of the samples after the head, i.e. samples
+                written before the head wrapped. Defaults to 0.
+
+        Returns:
+            int: number of samples kept
+        """
+        head = self.head
+        t_old = np.concatenate((self.t[head:] - t_shift, self.t[:head]))
+        kept = np.flatnonzero(np.isfinite(t_old))
+        # one sample is left free so the head stays inside the buffer
+        kept = kept[max(len(kept) - n_samples + 1, 0):]
+        order = np.concatenate((np.arange(head, len(self)), np.arange(head)))[kept]
+
+        rows = {ch: idx for idx, ch in enumerate(self.channels)}
+        block = np.full((len(channels), len(kept)), np.nan, dtype=self.dtype)
+        for row, channel in enumerate(channels):
+            if channel in rows:
+                block[row] = self.data[rows[channel], order]
+        valid = self.valid[order]
+
+        self.resize(channels, n_samples)
+        self.seek(0)
+        self.write(block, t_old[kept])
+        self.valid[:len(kept)] = valid
+        self.connect[:len(kept)] = valid
+        self.seek(len(kept))
+        return len(kept)
+
+    def write(self, block: np.ndarray, t: Optional[np.ndarray] = None) -> None:
+        """Write a block of samples at the write head. The head is not moved.
+
+        Args:
+            block (np.ndarray): channels x samples array. If the number of rows doesn't match the number
+                of channels in the buffer (e.g. while active channels are changed), NaNs are written instead
+            t (np.ndarray, optional): time vector of the block. Defaults to None.
+        """
+        length = len(self)
+        if length == 0:
+            return
+
+        n_new = block.shape[-1]
+        if n_new > length:
+            # only the most recent samples fit in the buffer
+            block = block[..., -length:]
+            t = t[-length:] if t is not None else None
+            n_new = length
+
+        matches = block.ndim == 2 and block.shape[0] == self.n_chan
+
+        end = self.head + n_new
+        if end <= length:
+            parts = [(slice(self.head, end), slice(0, n_new))]
+        else:
+            split = length - self.head
+            parts = [(slice(self.head, length), slice(0, split)), (slice(0, end - length), slice(split, n_new))]
+
+        for dst, src in parts:
+            if matches:
+                self.data[:, dst] = block[:, src]
+                self.valid[dst] = np.isfinite(block[:, src]).all(axis=0)
+            else:
+                self.data[:, dst] = np.nan
+                self.valid[dst] = False
+            self.connect[dst] = self.valid[dst]
+            if t is not None:
+                self.t[dst] = t[src]
+        # new samples might overlap the gap around the head
+        self.connect[self._gap_index] = 0
+
+    def advance(self, n_samples: int) -> bool:
+        """Move the write head
+
+        Args:
+            n_samples (int): number of samples to move the head
+
+        Returns:
+            bool: whether the head has wrapped around the end of the buffer
+        """
+        length = len(self)
+        self.n_written += n_samples
+        head = self.head + n_samples
+        wrapped = length > 0 and head >= length
+        self.seek(head % length if wrapped else head)
+        return wrapped
+
+    def seek(self, position: int) -> None:
+        """Set the write head position and move the gap of the connection vector with it
+
+        Args:
+            position (int): new head position
+        """
+        self.head = position
+        length = len(self)
+        # restore connection of the previous gap
+        self.connect[self._gap_index] = self.valid[self._gap_index]
+        self._gap_index = np.arange(max(position - self.gap, 0), min(position + self.gap, length))
+        if self.gap and position == 0 and length:
+            # the newest sample is not connected to the oldest one across the end of the buffer
+            self._gap_index = np.append(self._gap_index, length - 1)
+        self.connect[self._gap_index] = 0
+
+    def fill(self, value: float = np.nan) -> None:
+        """Fill the buffer and the time vector with a value
+
+        Args:
+            value (float, optional): value to fill. Defaults to np.nan.
+        """
+        self.data.fill(value)
+        self.t.fill(value)
+        self.valid.fill(np.isfinite(value))
+        self.connect[:] = self.valid
+        self.connect[self._gap_index] = 0
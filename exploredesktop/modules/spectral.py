@@ -0,0 +1,455 @@
+"""Spectral estimation of ExG data
+
+Windows, FFT sizes, frequency vectors and density scales are cached per sampling rate and segment length, so they
+are only computed once. The functions work on plain channels x samples arrays and can be used offline, e.g.:
+
+    freq, psd = welch_psd(exg, s_rate=250)
+"""
+import logging
+from functools import lru_cache
+from typing import (
+    Dict,
+    Optional,
+    Tuple
+)
+
+import numpy as np
+import scipy.fft
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window
+
+
+from exploredesktop.modules.app_settings import (  # isort:skip
+    PSDAveraging,
+    Settings
+)
+
+
+logger = logging.getLogger("explorepy." + __name__)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    """Returns array after making it read-only, cached arrays are shared by all callers"""
+    array.flags.writeable = False
+    return array
+
+
+def segment_size(s_rate: float, segment_length: float = Settings.PSD_SEGMENT_LENGTH) -> int:
+    """Number of samples in a segment
+
+    Args:
+        s_rate (float): sampling rate
+        segment_length (float, optional): segment length in seconds. Defaults to Settings.PSD_SEGMENT_LENGTH.
+    """
+    return int(round(segment_length * s_rate))
+
+
+@lru_cache(maxsize=None)
+def fft_size(s_rate: float, segment_length: float = Settings.PSD_SEGMENT_LENGTH) -> int:
+    """FFT size for a segment: next power of two of the segment size
+
+    Supported sampling rates are powers of two multiples of each other, so the spacing of the frequency vector
+    (s_rate / fft_size) is the same for all of them.
+
+    Args:
+        s_rate (float): sampling rate
+        segment_length (float, optional): segment length in seconds. Defaults to Settings.PSD_SEGMENT_LENGTH.
+    """
+    return 1 << (segment_size(s_rate, segment_length) - 1).bit_length()
+
+
+@lru_cache(maxsize=None)
+def spectral_window(n_per_seg: int) -> np.ndarray:
+    """Returns read-only Hann window of a segment
+
+    Args:
+        n_per_seg (int): samples per segment
+    """
+    return _read_only(get_window("hann", n_per_seg))
+
+
+@lru_cache(maxsize=None)
+def frequencies(s_rate: float, n_fft: int) -> np.ndarray:
+    """Returns read-only frequency vector of a one-sided spectrum
+
+    Args:
+        s_rate (float): sampling rate
+        n_fft (int): FFT size
+    """
+    return _read_only(np.fft.rfftfreq(n_fft, 1 / s_rate))
+
+
+@lru_cache(maxsize=None)
+def density_scale(s_rate: float, n_per_seg: int, n_fft: int) -> np.ndarray:
+    """Returns read-only scale from squared FFT magnitude to one-sided power spectral density
+
+    Power of negative frequencies is added to the positive ones, except at DC and Nyquist.
+
+    Args:
+        s_rate (float): sampling rate
+        n_per_seg (int): samples per segment
+        n_fft (int): FFT size
+    """
+    scale = np.full(n_fft // 2 + 1, 2 / (s_rate * np.sum(spectral_window(n_per_seg) ** 2)))
+    scale[0] /= 2
+    if n_fft % 2 == 0:
+        scale[-1] /= 2
+    return _read_only(scale)
+
+
+@lru_cache(maxsize=None)
+def band_weights(s_rate: float, n_fft: int, bands: Tuple[Tuple[float, float], ...]) -> np.ndarray:
+    """Returns read-only frequencies x bands matrix integrating a power spectral density over each band
+
+    Bins from the lower edge (included) to the upper edge (excluded) of a band are summed, times the frequency
+    resolution, so the band powers of all the channels are given by a single matrix product.
+
+    Args:
+        s_rate (float): sampling rate
+        n_fft (int): FFT size
+        bands (tuple): (low, high) edges of each band in Hz
+    """
+    freq = frequencies(s_rate, n_fft)[:, np.newaxis]
+    low, high = np.array(bands, dtype=float).T
+    return _read_only(((freq >= low) & (freq < high)) * (s_rate / n_fft))
+
+
+def periodograms(segments: np.ndarray, s_rate: float, n_fft: Optional[int] = None) -> np.ndarray:
+    """Power spectral density of each segment. Segments are detrended and windowed in place
+
+    Args:
+        segments (np.ndarray): contiguous float array of segments, samples in the last axis
+        s_rate (float): sampling rate
+        n_fft (int, optional): FFT size, segments are zero padded. Defaults to None (segment size).
+
+    Returns:
+        np.ndarray: power spectral density, frequencies in the last axis
+    """
+    n_per_seg = segments.shape[-1]
+    n_fft = n_fft or n_per_seg
+    segments -= segments.mean(axis=-1, keepdims=True)
+    segments *= spectral_window(n_per_seg)
+    spectrum = scipy.fft.rfft(segments, n=n_fft, axis=-1, overwrite_x=True)
+    power = np.square(spectrum.real)
+    power += np.square(spectrum.imag)
+    power *= density_scale(s_rate, n_per_seg, n_fft)
+    return power
+
+
+def welch_psd(
+    exg: np.ndarray, s_rate: float, segment_length: float = Settings.PSD_SEGMENT_LENGTH,
+    overlap: float = Settings.PSD_OVERLAP
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Welch power spectral density of a recording
+
+    Args:
+        exg (np.ndarray): channels x samples data
+        s_rate (float): sampling rate
+        segment_length (float, optional): segment length in seconds. Defaults to Settings.PSD_SEGMENT_LENGTH.
+        overlap (float, optional): overlap between segments, from 0 to 1. Defaults to Settings.PSD_OVERLAP.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: frequency vector and channels x frequencies power spectral density in uV^2/Hz
+    """
+    n_per_seg = segment_size(s_rate, segment_length)
+    n_fft = fft_size(s_rate, segment_length)
+    hop = max(int(round(n_per_seg * (1 - overlap))), 1)
+    exg = np.asarray(exg, dtype=float)
+    if exg.shape[-1] < n_per_seg:
+        raise ValueError(f"At least {n_per_seg} samples are needed, got {exg.shape[-1]}")
+    starts = np.arange(0, exg.shape[-1] - n_per_seg + 1, hop)
+    # indexing copies the segments, so they can be modified in place
+    segments = sliding_window_view(exg, n_per_seg, axis=-1)[..., starts, :]
+    return frequencies(s_rate, n_fft), periodograms(segments, s_rate, n_fft).mean(axis=-2)
+
+
+class WelchEstimator:
+    """Streaming Welch power spectral density estimate for channels x samples blocks
+
+    Incoming samples are split in overlapping segments. As soon as a segment is complete, its mean is removed and
+    the periodogram of the windowed segment is added to the average, so the cost of each update only depends on
+    the new samples. The average is either exponential or over the last `n_average` segments. The estimate can be
+    read at any time and at any rate.
+
+    Args:
+        s_rate (float): sampling rate of the data
+        n_chan (int): number of channels
+        segment_length (float, optional): segment length in seconds. Defaults to Settings.PSD_SEGMENT_LENGTH.
+        overlap (float, optional): overlap between segments, from 0 to 1. Defaults to Settings.PSD_OVERLAP.
+        averaging (PSDAveraging, optional): averaging mode. Defaults to Settings.PSD_AVERAGING.
+        n_average (int, optional): number of segments in the average (fixed) or time constant in segments
+            (exponential). Defaults to Settings.PSD_N_AVERAGE.
+    """
+
+    def __init__(
+        self, s_rate: float, n_chan: int, segment_length: float = Settings.PSD_SEGMENT_LENGTH,
+        overlap: float = Settings.PSD_OVERLAP, averaging: PSDAveraging = Settings.PSD_AVERAGING,
+        n_average: int = Settings.PSD_N_AVERAGE
+    ) -> None:
+        self.s_rate = s_rate
+        self.n_chan = n_chan
+        self.averaging = averaging
+        self.n_average = max(int(n_average), 1)
+
+        self.n_per_seg = segment_size(s_rate, segment_length)
+        self.n_fft = fft_size(s_rate, segment_length)
+        self.hop = max(int(round(self.n_per_seg * (1 - overlap))), 1)
+        self.freq = frequencies(s_rate, self.n_fft)
+
+        # samples of the segment being filled
+        self._pending = np.empty((n_chan, 0))
+        self.n_segments = 0
+        if averaging == PSDAveraging.FIXED:
+            # last periodograms, NaN where the segment had missing data
+            self._periodograms = np.full((self.n_average, n_chan, len(self.freq)), np.nan)
+        self._psd = np.full((n_chan, len(self.freq)), np.nan)
+
+    def accepts(self, s_rate: float, n_chan: int) -> bool:
+        """Whether the estimator can process data with the given sampling rate and number of channels
+
+        Args:
+            s_rate (float): sampling rate
+            n_chan (int): number of channels
+        """
+        return s_rate == self.s_rate and n_chan == self.n_chan
+
+    def update(self, block: np.ndarray) -> int:
+        """Add a block of samples and update the average with the segments completed by it
+
+        Args:
+            block (np.ndarray): channels x samples block
+
+        Returns:
+            int: number of completed segments
+        """
+        samples = np.concatenate((self._pending, block), axis=1)
+        starts = np.arange(0, samples.shape[1] - self.n_per_seg + 1, self.hop)
+        if len(starts) == 0:
+            self._pending = samples
+            return 0
+
+        # n_chan x n_segments x n_per_seg, indexing copies the segments
+        segments = sliding_window_view(samples, self.n_per_seg, axis=1)[:, starts]
+        power = periodograms(segments, self.s_rate, self.n_fft)
+        for idx in range(len(starts)):
+            self._add_periodogram(power[:, idx])
+
+        self._pending = samples[:, starts[-1] + self.hop:]
+        return len(starts)
+
+    def _add_periodogram(self, periodogram: np.ndarray) -> None:
+        """Add the periodogram of a segment to the average
+
+        Args:
+            periodogram (np.ndarray): channels x frequencies periodogram
+        """
+        # channels with missing data in the segment are not updated
+        finite = np.isfinite(periodogram).all(axis=1)
+        if self.averaging == PSDAveraging.FIXED:
+            slot = self.n_segments % self.n_average
+            self._periodograms[slot] = np.where(finite[:, np.newaxis], periodogram, np.nan)
+        else:
+            alpha = 1 / min(self.n_segments + 1, self.n_average)
+            update = finite & np.isfinite(self._psd).all(axis=1)
+            self._psd[update] += alpha * (periodogram[update] - self._psd[update])
+            # first segment of each channel
+            first = finite & ~update
+            self._psd[first] = periodogram[first]
+        self.n_segments += 1
+
+    @property
+    def psd(self) -> Optional[np.ndarray]:
+        """Returns channels x frequencies power spectral density in uV^2/Hz, None if no segment is complete"""
+        if self.n_segments == 0:
+            return None
+        if self.averaging == PSDAveraging.FIXED:
+            valid = np.isfinite(self._periodograms)
+            with np.errstate(invalid="ignore"):
+                return np.where(valid, self._periodograms, 0).sum(axis=0) / valid.sum(axis=0)
+        return self._psd.copy()
+
+    def reset(self) -> None:
+        """Discard pending samples and the average"""
+        self._pending = np.empty((self.n_chan, 0))
+        self.n_segments = 0
+        if self.averaging == PSDAveraging.FIXED:
+            self._periodograms[:] = np.nan
+        self._psd[:] = np.nan
+
+
+class SpectrogramEstimator:
+    """Incremental short-time Fourier transform of one channel
+
+    A new column is computed for every `hop` new samples, from the last segment of data only, and stored in a ring
+    of columns holding the last `duration` seconds. Columns are power spectral densities in dB up to `max_freq`.
+
+    Args:
+        s_rate (float): sampling rate of the data
+        segment_length (float, optional): segment length in seconds. Defaults to Settings.SPECTROGRAM_SEGMENT_LENGTH.
+        hop (float, optional): seconds between columns. Defaults to Settings.SPECTROGRAM_HOP.
+        duration (float, optional): seconds of columns kept. Defaults to Settings.SPECTROGRAM_DURATION.
+        max_freq (float, optional): highest frequency kept. Defaults to Settings.SPECTROGRAM_MAX_FREQ.
+    """
+
+    def __init__(
+        self, s_rate: float, segment_length: float = Settings.SPECTROGRAM_SEGMENT_LENGTH,
+        hop: float = Settings.SPECTROGRAM_HOP, duration: float = Settings.SPECTROGRAM_DURATION,
+        max_freq: float = Settings.SPECTROGRAM_MAX_FREQ
+    ) -> None:
+        self.s_rate = s_rate
+        self.n_per_seg = segment_size(s_rate, segment_length)
+        self.n_fft = fft_size(s_rate, segment_length)
+        self.hop = max(int(round(hop * s_rate)), 1)
+
+        freq = frequencies(s_rate, self.n_fft)
+        self.n_freq = int(np.searchsorted(freq, max_freq, side="right"))
+        self.freq = freq[:self.n_freq]
+        self.n_columns = max(int(round(duration * s_rate / self.hop)), 1)
+        self.duration = self.n_columns * self.hop / s_rate
+
+        # ring of columns, the next one is written at head
+        self._columns = np.full((self.n_columns, self.n_freq), np.nan, dtype=np.float32)
+        self._head = 0
+        self._pending = np.empty(0)
+
+    def accepts(self, s_rate: float) -> bool:
+        """Whether the estimator can process data with the given sampling rate
+
+        Args:
+            s_rate (float): sampling rate
+        """
+        return s_rate == self.s_rate
+
+    def update(self, samples: np.ndarray) -> int:
+        """Add samples and compute the columns completed by them
+
+        Args:
+            samples (np.ndarray): new samples of the channel
+
+        Returns:
+            int: number of new columns
+        """
+        samples = np.concatenate((self._pending, samples))
+        starts = np.arange(0, len(samples) - self.n_per_seg + 1, self.hop)
+        if len(starts) == 0:
+            self._pending = samples
+            return 0
+        self._pending = samples[starts[-1] + self.hop:]
+
+        # older columns would be overwritten in the same update
+        starts = starts[-self.n_columns:]
+        segments = sliding_window_view(samples, self.n_per_seg)[starts]
+        power = periodograms(segments, self.s_rate, self.n_fft)[:, :self.n_freq]
+        idx = (self._head + np.arange(len(starts))) % self.n_columns
+        with np.errstate(divide="ignore"):
+            self._columns[idx] = 10 * np.log10(power)
+        self._head = (idx[-1] + 1) % self.n_columns
+        return len(starts)
+
+    def image(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns columns x frequencies spectrogram in dB, oldest column first
+
+        Args:
+            out (np.ndarray, optional): array where the image is written. Defaults to None (new array).
+        """
+        if out is None:
+            out = np.empty_like(self._columns)
+        n_old = self.n_columns - self._head
+        out[:n_old] = self._columns[self._head:]
+        out[n_old:] = self._columns[:self._head]
+        return out
+
+
+class BandPowerEstimator:
+    """Streaming power of each channel in frequency bands
+
+    A new estimate is computed for every `hop` new samples from the last segment of data only. The periodogram of
+    the segment is integrated over the bands with a single matrix product for all the channels and bands, and added
+    to an exponential moving average of the band powers, so the cost of each estimate is one FFT per channel.
+
+    Args:
+        s_rate (float): sampling rate of the data
+        n_chan (int): number of channels
+        bands (dict, optional): (low, high) edges in Hz of each band. Defaults to Settings.BAND_POWER_BANDS.
+        segment_length (float, optional): segment length in seconds. Defaults to Settings.BAND_POWER_SEGMENT_LENGTH.
+        hop (float, optional): seconds between estimates. Defaults to Settings.BAND_POWER_HOP.
+        time_constant (float, optional): time constant of the average in seconds, 0 to disable the average.
+            Defaults to Settings.BAND_POWER_TIME_CONSTANT.
+    """
+
+    def __init__(
+        self, s_rate: float, n_chan: int, bands: Dict[str, Tuple[float, float]] = Settings.BAND_POWER_BANDS,
+        segment_length: float = Settings.BAND_POWER_SEGMENT_LENGTH, hop: float = Settings.BAND_POWER_HOP,
+        time_constant: float = Settings.BAND_POWER_TIME_CONSTANT
+    ) -> None:
+        self.s_rate = s_rate
+        self.n_chan = n_chan
+        self.bands = list(bands)
+
+        self.n_per_seg = segment_size(s_rate, segment_length)
+        self.n_fft = fft_size(s_rate, segment_length)
+        self.hop = max(int(round(hop * s_rate)), 1)
+        self.weights = band_weights(s_rate, self.n_fft, tuple(tuple(edges) for edges in bands.values()))
+        # weight of each new estimate in the average
+        self.alpha = 1 - np.exp(-self.hop / (time_constant * s_rate)) if time_constant > 0 else 1.
+
+        self._pending = np.empty((n_chan, 0))
+        self._power = np.full((n_chan, len(self.bands)), np.nan)
+
+    @property
+    def rate(self) -> float:
+        """Returns number of estimates per second"""
+        return self.s_rate / self.hop
+
+    def accepts(self, s_rate: float, n_chan: int) -> bool:
+        """Whether the estimator can process data with the given sampling rate and number of channels
+
+        Args:
+            s_rate (float): sampling rate
+            n_chan (int): number of channels
+        """
+        return s_rate == self.s_rate and n_chan == self.n_chan
+
+    def update(self, block: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Add a block of samples and compute the estimates completed by it
+
+        Args:
+            block (np.ndarray): channels x samples block
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: estimates x channels x bands averaged band powers in uV^2, one per
+                completed segment, and index in the block of the last sample of each segment
+        """
+        n_old = self._pending.shape[1]
+        samples = np.concatenate((self._pending, block), axis=1)
+        starts = np.arange(0, samples.shape[1] - self.n_per_seg + 1, self.hop)
+        if len(starts) == 0:
+            self._pending = samples
+            return np.empty((0, self.n_chan, len(self.bands))), np.empty(0, dtype=int)
+        self._pending = samples[:, starts[-1] + self.hop:]
+
+        # n_chan x n_segments x n_per_seg, indexing copies the segments
+        segments = sliding_window_view(samples, self.n_per_seg, axis=1)[:, starts]
+        band_power = periodograms(segments, self.s_rate, self.n_fft) @ self.weights
+        estimates = np.empty((len(starts), self.n_chan, len(self.bands)))
+        for idx in range(len(starts)):
+            new = band_power[:, idx]
+            # channels with missing data in the segment keep their estimate
+            finite = np.isfinite(new).all(axis=1)
+            first = finite & np.isnan(self._power).any(axis=1)
+            self._power[finite] += self.alpha * (new[finite] - self._power[finite])
+            self._power[first] = new[first]
+            estimates[idx] = self._power
+        return estimates, starts + self.n_per_seg - 1 - n_old
+
+    @property
+    def power(self) -> Optional[np.ndarray]:
+        """Returns channels x bands averaged band powers in uV^2, None if no segment is complete"""
+        if np.isnan(self._power).all():
+            return None
+        return self._power.copy()
+
+    def reset(self) -> None:
+        """Discard pending samples and the average"""
+        self._pending = np.empty((self.n_chan, 0))
+        self._power[:] = np.nan
@@ -0,0 +1,63 @@
+import numpy as np
+
+
+from exploredesktop.modules.decimation import PolyphaseDecimator  # isort:skip
+
+
+S_RATE = 1000
+FACTOR = 4
+
+
+def _signal(n_samples, n_chan=3):
+    """Time vector and channels x samples sum of sines"""
+    time_vector = 10 + np.arange(n_samples) / S_RATE
+    freq = np.array([3., 17., 40.])[:n_chan, np.newaxis]
+    return time_vector, np.sin(2 * np.pi * freq * time_vector)
+
+
+def _process_in_packets(decimator, time_vector, exg, sizes):
+    """Decimate a signal split in packets of the given sizes"""
+    t_parts, exg_parts = [], []
+    start = 0
+    for size in sizes:
+        t_out, exg_out = decimator.process(time_vector[start:start + size], exg[:, start:start + size])
+        t_parts.append(t_out)
+        exg_parts.append(exg_out)
+        start += size
+    return np.concatenate(t_parts), np.concatenate(exg_parts, axis=1)
+
+
+class TestPolyphaseDecimator:
+    def test_packets_match_one_block(self):
+        time_vector, exg = _signal(2000)
+        t_ref, exg_ref = PolyphaseDecimator(S_RATE, FACTOR, 3).process(time_vector, exg)
+
+        # packet sizes not multiple of the factor, including empty and single sample packets
+        sizes = [7, 1, 0, 33, 13, 4, 16, 5] * 40
+        sizes.append(len(time_vector) - sum(sizes))
+        t_out, exg_out = _process_in_packets(PolyphaseDecimator(S_RATE, FACTOR, 3), time_vector, exg, sizes)
+
+        np.testing.assert_allclose(t_out, t_ref)
+        np.testing.assert_allclose(exg_out, exg_ref, atol=1e-12)
+
+    def test_output_is_evenly_spaced(self):
+        time_vector, exg = _signal(2000)
+        decimator = PolyphaseDecimator(S_RATE, FACTOR, 3)
+        t_out, exg_out = _process_in_packets(decimator, time_vector, exg, [16] * 125)
+
+        assert exg_out.shape == (3, len(t_out))
+        np.testing.assert_allclose(np.diff(t_out), FACTOR / S_RATE)
+        # outputs start at the first sample and lag the last one by the filter delay
+        assert t_out[0] == time_vector[0]
+        assert time_vector[-1] - t_out[-1] < (decimator.delay + FACTOR) / S_RATE
+
+    def test_passband_is_kept_and_delay_is_compensated(self):
+        time_vector, exg = _signal(4000)
+        decimator = PolyphaseDecimator(S_RATE, FACTOR, 3)
+        t_out, exg_out = _process_in_packets(decimator, time_vector, exg, [32] * 125)
+
+        # after the start-up transient, low frequencies are kept in phase with the input
+        steady = t_out > time_vector[0] + decimator.n_taps / S_RATE
+        freq = np.array([3., 17.])[:, np.newaxis]
+        expected = np.sin(2 * np.pi * freq * t_out[steady])
+        np.testing.assert_allclose(exg_out[:2, steady], expected, atol=0.02)
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pytest
+
+
+from exploredesktop.modules.history_store import HistoryStore  # isort:skip
+
+
+S_RATE = 10
+CHANNELS = ["ch1", "ch2", "ch3"]
+
+
+@pytest.fixture
+def store():
+    # 5 samples per chunk, 2 chunks in RAM, the rest is spilled to disk
+    history = HistoryStore(CHANNELS, S_RATE, length=100, chunk_size=5, ram_chunks=2)
+    yield history
+    history.close()
+
+
+def _signal(start, stop):
+    """Time vector and channels x samples data, each sample holds its index plus 1000 * row"""
+    idx = np.arange(start, stop)
+    return idx / S_RATE, (idx[np.newaxis, :] + 1000. * np.arange(len(CHANNELS))[:, np.newaxis]).astype(np.float32)
+
+
+def _append_in_packets(history, start, stop, packet_size=7):
+    for first in range(start, stop, packet_size):
+        history.append(*_signal(first, min(first + packet_size, stop)))
+
+
+class TestHistoryStore:
+    def test_readback_in_ram(self, store):
+        _append_in_packets(store, 0, 12)
+        time_vector, data = store.get(0, 2)
+
+        np.testing.assert_array_equal(time_vector, _signal(0, 12)[0])
+        np.testing.assert_array_equal(data, _signal(0, 12)[1])
+        assert store._mmap is None
+
+    def test_readback_across_the_spill(self, store):
+        _append_in_packets(store, 0, 63)
+        assert store._mmap is not None
+        assert os.path.exists(store._file)
+
+        time_vector, data = store.get(*store.t_range)
+        np.testing.assert_array_equal(time_vector, _signal(0, 63)[0])
+        np.testing.assert_array_equal(data, _signal(0, 63)[1])
+
+    def test_readback_of_a_range(self, store):
+        _append_in_packets(store, 0, 63)
+        time_vector, data = store.get(1.2, 4.5, channels=["ch3", "ch1"])
+
+        # one sample after the range is included so the plot reaches its end
+        np.testing.assert_array_equal(time_vector, _signal(12, 46)[0])
+        np.testing.assert_array_equal(data, _signal(12, 46)[1][[2, 0]])
+
+    def test_old_chunks_are_discarded(self):
+        history = HistoryStore(CHANNELS, S_RATE, length=3, chunk_size=5, ram_chunks=2)
+        try:
+            _append_in_packets(history, 0, 100)
+            t_first, t_last = history.t_range
+            assert t_last == pytest.approx(9.9)
+            # only whole chunks of 0.5 s are discarded
+            assert t_last - 3 - 0.5 <= t_first <= t_last - 3 + 0.5
+            time_vector, _ = history.get(*history.t_range)
+            np.testing.assert_allclose(np.diff(time_vector), 1 / S_RATE)
+        finally:
+            history.close()
+
+    def test_inactive_channels_are_nan(self, store):
+        time_vector, data = _signal(0, 40)
+        store.append(time_vector[:20], data[:, :20])
+        store.append(time_vector[20:], data[[0, 2], 20:], channels=["ch1", "ch3"])
+
+        _, stored = store.get(0, 4)
+        np.testing.assert_array_equal(stored[[0, 2]], data[[0, 2]])
+        np.testing.assert_array_equal(stored[1, :20], data[1, :20])
+        assert np.isnan(stored[1, 20:]).all()
+
+    def test_accepts_subsets_of_the_channels(self, store):
+        assert store.accepts(["ch1", "ch3"], S_RATE)
+        assert not store.accepts(["ch1", "ch4"], S_RATE)
+        assert not store.accepts(CHANNELS, 2 * S_RATE)
+
+    def test_close_removes_the_file(self, store):
+        _append_in_packets(store, 0, 63)
+        file_name = store._file
+        store.close()
+
+        assert not os.path.exists(file_name)
+        assert store.t_range is None
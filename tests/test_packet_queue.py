@@ -0,0 +1,63 @@
+from exploredesktop.modules.app_settings import QueuePolicy  # isort:skip
+from exploredesktop.modules.packet_queue import PacketQueue  # isort:skip
+
+
+class TestPacketQueue:
+    def test_items_are_returned_in_order(self):
+        queue = PacketQueue(size=8)
+        for item in range(5):
+            queue.put(item)
+
+        assert len(queue) == 5
+        assert queue.get_all() == [0, 1, 2, 3, 4]
+        assert len(queue) == 0
+        assert queue.get_all() == []
+        assert queue.dropped == 0
+
+    def test_overflow_drops_the_oldest_items(self):
+        queue = PacketQueue(size=4)
+        for item in range(10):
+            queue.put(item)
+
+        assert len(queue) == 4
+        assert queue.get_all() == [6, 7, 8, 9]
+        assert queue.dropped == 6
+
+    def test_dropped_items_are_counted_once(self):
+        queue = PacketQueue(size=4)
+        for item in range(6):
+            queue.put(item)
+        assert queue.get_all() == [2, 3, 4, 5]
+
+        for item in range(6, 9):
+            queue.put(item)
+        assert queue.get_all() == [6, 7, 8]
+        assert queue.dropped == 2
+
+    def test_counters_keep_working_after_many_laps(self):
+        queue = PacketQueue(size=3)
+        for lap in range(100):
+            queue.put(2 * lap)
+            queue.put(2 * lap + 1)
+            assert queue.get_all() == [2 * lap, 2 * lap + 1]
+        assert queue.dropped == 0
+
+    def test_clear_discards_the_items(self):
+        queue = PacketQueue(size=4)
+        for item in range(3):
+            queue.put(item)
+        queue.clear()
+
+        assert len(queue) == 0
+        queue.put(3)
+        assert queue.get_all() == [3]
+        assert queue.dropped == 0
+
+    def test_block_policy_overwrites_after_timeout(self):
+        queue = PacketQueue(size=2, policy=QueuePolicy.BLOCK)
+        for item in range(3):
+            queue.put(item)
+
+        assert queue.blocked == 1
+        assert queue.get_all() == [1, 2]
+        assert queue.dropped == 1
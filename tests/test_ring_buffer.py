@@ -0,0 +1,83 @@
+import numpy as np
+
+
+from exploredesktop.modules.ring_buffer import RingBuffer  # isort:skip
+
+
+def _block(n_chan, start, stop):
+    """Channels x samples block, each sample holds its index plus 100 * row"""
+    return np.arange(start, stop)[np.newaxis, :] + 100. * np.arange(n_chan)[:, np.newaxis]
+
+
+class TestRingBuffer:
+    def test_write_wraps_around_the_end(self):
+        buffer = RingBuffer(["ch1", "ch2"], 10)
+        buffer.seek(8)
+        buffer.write(_block(2, 0, 4), np.arange(4.))
+
+        np.testing.assert_array_equal(buffer.data[:, 8:], _block(2, 0, 2))
+        np.testing.assert_array_equal(buffer.data[:, :2], _block(2, 2, 4))
+        np.testing.assert_array_equal(buffer.t[[8, 9, 0, 1]], np.arange(4.))
+        assert np.isnan(buffer.data[:, 2:8]).all()
+
+        assert buffer.advance(4)
+        assert buffer.head == 2
+        assert buffer.n_written == 4
+
+    def test_write_keeps_the_most_recent_samples(self):
+        buffer = RingBuffer(["ch1"], 5)
+        buffer.write(_block(1, 0, 12), np.arange(12.))
+        np.testing.assert_array_equal(buffer.data[0], np.arange(7, 12))
+
+    def test_views_follow_the_data(self):
+        buffer = RingBuffer(["ch1", "ch2"], 4)
+        buffer.write(_block(2, 0, 4))
+        np.testing.assert_array_equal(buffer.views["ch2"], _block(2, 0, 4)[1])
+        assert np.shares_memory(buffer.views["ch2"], buffer.data)
+
+    def test_gap_around_head_is_not_connected(self):
+        buffer = RingBuffer(["ch1"], 10, gap=1)
+        buffer.write(_block(1, 0, 10), np.arange(10.))
+        buffer.seek(5)
+        np.testing.assert_array_equal(buffer.connect, [1, 1, 1, 1, 0, 0, 1, 1, 1, 1])
+
+        # the newest sample is not joined to the oldest one
+        buffer.seek(0)
+        assert buffer.connect[-1] == 0
+        assert buffer.connect[4] == 1
+
+    def test_missing_data_is_not_connected(self):
+        buffer = RingBuffer(["ch1", "ch2"], 4)
+        block = _block(2, 0, 4)
+        block[1, 2] = np.nan
+        buffer.write(block)
+        np.testing.assert_array_equal(buffer.valid, [True, True, False, True])
+        np.testing.assert_array_equal(buffer.connect, [1, 1, 0, 1])
+
+    def test_rewindow_keeps_the_most_recent_samples_in_order(self):
+        buffer = RingBuffer(["ch1", "ch2"], 10)
+        buffer.write(_block(2, 0, 10), np.arange(10.))
+        buffer.advance(10)
+        buffer.write(_block(2, 10, 13), np.arange(10., 13.))
+        buffer.advance(3)
+
+        n_kept = buffer.rewindow(["ch2", "ch1"], 6)
+
+        # one sample is left free for the head
+        assert n_kept == 5
+        assert buffer.head == 5
+        np.testing.assert_array_equal(buffer.t[:5], np.arange(8., 13.))
+        np.testing.assert_array_equal(buffer.views["ch1"][:5], np.arange(8, 13))
+        np.testing.assert_array_equal(buffer.views["ch2"][:5], np.arange(108, 113))
+        assert np.isnan(buffer.t[5])
+
+    def test_rewindow_keeps_connection_with_a_new_channel(self):
+        buffer = RingBuffer(["ch1"], 10)
+        buffer.write(_block(1, 0, 4), np.arange(4.))
+        buffer.advance(4)
+
+        n_kept = buffer.rewindow(["ch1", "ch2"], 10)
+
+        assert n_kept == 4
+        assert np.isnan(buffer.views["ch2"][:4]).all()
+        np.testing.assert_array_equal(buffer.connect[:3], [1, 1, 1])
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from scipy.signal import welch
+
+
+from exploredesktop.modules.app_settings import PSDAveraging  # isort:skip
+from exploredesktop.modules.spectral import (  # isort:skip
+    WelchEstimator,
+    fft_size,
+    segment_size,
+    welch_psd
+)
+
+
+def _noise(s_rate, duration, n_chan=2):
+    """Channels x samples white noise plus a sine at 10 Hz"""
+    rng = np.random.default_rng(0)
+    time_vector = np.arange(int(duration * s_rate)) / s_rate
+    return 20 * rng.standard_normal((n_chan, len(time_vector))) + 50 * np.sin(2 * np.pi * 10 * time_vector)
+
+
+def _scipy_welch(exg, s_rate, segment_length, overlap):
+    n_per_seg = segment_size(s_rate, segment_length)
+    hop = max(int(round(n_per_seg * (1 - overlap))), 1)
+    return welch(
+        exg, fs=s_rate, window="hann", nperseg=n_per_seg, noverlap=n_per_seg - hop,
+        nfft=fft_size(s_rate, segment_length), detrend="constant", scaling="density", axis=-1
+    )
+
+
+class TestWelchPSD:
+    @pytest.mark.parametrize("s_rate", [250, 500, 1000])
+    def test_matches_scipy(self, s_rate):
+        exg = _noise(s_rate, 20)
+        freq, psd = welch_psd(exg, s_rate)
+        freq_ref, psd_ref = _scipy_welch(exg, s_rate, 2, 0.5)
+
+        np.testing.assert_allclose(freq, freq_ref)
+        np.testing.assert_allclose(psd, psd_ref, rtol=1e-9)
+
+    def test_matches_scipy_with_other_segments(self):
+        exg = _noise(250, 13.3, n_chan=1)
+        freq, psd = welch_psd(exg, 250, segment_length=1.5, overlap=0.75)
+        freq_ref, psd_ref = _scipy_welch(exg, 250, 1.5, 0.75)
+
+        np.testing.assert_allclose(freq, freq_ref)
+        np.testing.assert_allclose(psd, psd_ref, rtol=1e-9)
+
+    def test_short_recording_is_rejected(self):
+        with pytest.raises(ValueError):
+            welch_psd(np.zeros((1, 100)), 250)
+
+    def test_streaming_estimate_matches_scipy(self):
+        s_rate = 250
+        exg = _noise(s_rate, 20)
+        estimator = WelchEstimator(s_rate, 2, averaging=PSDAveraging.FIXED, n_average=100)
+        for start in range(0, exg.shape[1], 33):
+            estimator.update(exg[:, start:start + 33])
+
+        _, psd_ref = _scipy_welch(exg, s_rate, 2, 0.5)
+        assert estimator.n_segments == 19
+        np.testing.assert_allclose(estimator.psd, psd_ref, rtol=1e-9)